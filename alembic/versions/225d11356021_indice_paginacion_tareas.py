@@ -0,0 +1,42 @@
+"""indice para paginacion de tareas
+
+Revision ID: 225d11356021
+Revises: f7044a857dfb
+Create Date: 2026-10-18 09:12:41.381205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '225d11356021'
+down_revision: Union[str, Sequence[str], None] = 'f7044a857dfb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no bloquea las escrituras en tablas grandes, pero no puede
+    # ejecutarse dentro de una transacción.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_usuario_fecha_id',
+            'tasks',
+            ['id_usuario', 'fecha_creacion', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_usuario_fecha_id',
+            table_name='tasks',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,51 @@
+"""auditoria de indices
+
+Revision ID: 2890e176d5e7
+Revises: 969ec8feb982
+Create Date: 2026-10-18 12:48:24.535286
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2890e176d5e7'
+down_revision: Union[str, Sequence[str], None] = '969ec8feb982'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplican los índices de las claves primarias y solo añaden coste a cada
+    # escritura. tasks.id_usuario no necesita índice propio: los índices
+    # compuestos que empiezan por id_usuario sirven también a la clave foránea.
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_id', table_name='tasks', postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_users_id', table_name='users', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_id',
+            'users',
+            ['id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_tasks_id',
+            'tasks',
+            ['id'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
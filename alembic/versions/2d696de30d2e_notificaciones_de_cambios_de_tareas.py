@@ -0,0 +1,72 @@
+"""notificaciones de cambios de tareas
+
+Revision ID: 2d696de30d2e
+Revises: b27d44ab12f2
+Create Date: 2026-10-18 12:41:40.213436
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d696de30d2e'
+down_revision: Union[str, Sequence[str], None] = 'b27d44ab12f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Una notificación por fila modificada, con los datos mínimos para que el
+    # cliente decida si volver a leer la tarea (el payload admite 8000 bytes).
+    # PostgreSQL las entrega al confirmar la transacción.
+    op.execute("""
+        CREATE FUNCTION tasks_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            operacion text := lower(TG_OP);
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                IF coalesce(current_setting('app.archiving', true), '') = 'on' THEN
+                    operacion := 'archive';
+                END IF;
+                PERFORM pg_notify('task_changes', json_build_object(
+                    'op', operacion, 'id', id, 'id_usuario', id_usuario,
+                    'version', version, 'estado', estado)::text)
+                FROM old_rows;
+            ELSE
+                PERFORM pg_notify('task_changes', json_build_object(
+                    'op', operacion, 'id', id, 'id_usuario', id_usuario,
+                    'version', version, 'estado', estado)::text)
+                FROM new_rows;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_notify_insert AFTER INSERT ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION tasks_notify()
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_notify_update AFTER UPDATE ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION tasks_notify()
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_notify_delete AFTER DELETE ON tasks
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION tasks_notify()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER tasks_notify_delete ON tasks")
+    op.execute("DROP TRIGGER tasks_notify_update ON tasks")
+    op.execute("DROP TRIGGER tasks_notify_insert ON tasks")
+    op.execute("DROP FUNCTION tasks_notify()")
@@ -0,0 +1,54 @@
+"""busqueda de texto en tareas
+
+Revision ID: 35a4789a103f
+Revises: 9a1b3b3f603f
+Create Date: 2026-10-18 12:58:22.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '35a4789a103f'
+down_revision: Union[str, Sequence[str], None] = '9a1b3b3f603f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Añadir una columna generada reescribe la tabla bajo un bloqueo exclusivo
+    op.add_column('tasks', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('spanish', titulo), 'A') || "
+            "setweight(to_tsvector('spanish', coalesce(descripcion, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_search_vector',
+            'tasks',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_search_vector',
+            table_name='tasks',
+            postgresql_concurrently=True,
+        )
+    op.drop_column('tasks', 'search_vector')
@@ -0,0 +1,68 @@
+"""orden de bloqueos de tareas
+
+Revision ID: 47244d3c5b70
+Revises: 10928fda44d7
+Create Date: 2026-10-18 13:15:55.830461
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47244d3c5b70'
+down_revision: Union[str, Sequence[str], None] = '10928fda44d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Orden único de bloqueos en tasks: lock del usuario, filas de tasks y
+    # después contadores. Las rutas toman el lock antes de tocar ninguna fila;
+    # los triggers BEFORE ROW lo vuelven a pedir (sin esperar, ya es suyo) para
+    # las escrituras que no pasan por la API. El borrado lo tomaba en el
+    # trigger AFTER de tombstones, que corre después del de contadores.
+    op.execute("""
+        CREATE FUNCTION tasks_lock_usuario() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('tasks'), OLD.id_usuario);
+            RETURN OLD;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_lock_usuario BEFORE DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_lock_usuario()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_tombstones() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO task_tombstones (id, id_usuario, change_seq)
+            SELECT id, id_usuario, nextval('task_change_seq') FROM old_rows;
+            RETURN NULL;
+        END;
+        $$
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_tombstones() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('tasks'), id_usuario)
+            FROM (SELECT DISTINCT id_usuario FROM old_rows ORDER BY id_usuario) AS usuarios;
+            INSERT INTO task_tombstones (id, id_usuario, change_seq)
+            SELECT id, id_usuario, nextval('task_change_seq') FROM old_rows;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("DROP TRIGGER tasks_lock_usuario ON tasks")
+    op.execute("DROP FUNCTION tasks_lock_usuario()")
@@ -0,0 +1,53 @@
+"""indices de filtros de tareas
+
+Revision ID: 5eee48c7568f
+Revises: 2890e176d5e7
+Create Date: 2026-10-18 12:51:46.947674
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5eee48c7568f'
+down_revision: Union[str, Sequence[str], None] = '2890e176d5e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_pendientes_usuario_fecha_id',
+            'tasks',
+            ['id_usuario', 'fecha_creacion', 'id'],
+            unique=False,
+            postgresql_where=sa.text("estado = 'pendiente'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_tasks_usuario_updated_id',
+            'tasks',
+            ['id_usuario', 'updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_usuario_updated_id',
+            table_name='tasks',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_tasks_pendientes_usuario_fecha_id',
+            table_name='tasks',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,96 @@
+"""sincronizacion incremental de tareas
+
+Revision ID: 969ec8feb982
+Revises: 2d696de30d2e
+Create Date: 2026-10-18 12:45:56.922972
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '969ec8feb982'
+down_revision: Union[str, Sequence[str], None] = '2d696de30d2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_tombstones',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['id_usuario'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_tombstones_usuario_seq_id', 'task_tombstones', ['id_usuario', 'change_seq', 'id'], unique=False)
+    # Valor por defecto no volátil: no reescribe la tabla y las tareas
+    # existentes quedan con 0, que solo devuelve la sincronización completa
+    op.add_column('tasks', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.execute("CREATE SEQUENCE task_change_seq")
+    # Cada escritura toma un advisory lock del usuario hasta el commit antes de
+    # pedir su número. Así las escrituras de un mismo usuario se confirman en
+    # el orden de change_seq y un cliente que ya vio el número N no puede
+    # encontrarse después un cambio suyo con un número menor.
+    op.execute("""
+        CREATE FUNCTION tasks_change_seq() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('tasks'), NEW.id_usuario);
+            NEW.change_seq := nextval('task_change_seq');
+            RETURN NEW;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_change_seq BEFORE INSERT OR UPDATE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_change_seq()
+    """)
+    op.execute("""
+        CREATE FUNCTION tasks_tombstones() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('tasks'), id_usuario)
+            FROM (SELECT DISTINCT id_usuario FROM old_rows ORDER BY id_usuario) AS usuarios;
+            INSERT INTO task_tombstones (id, id_usuario, change_seq)
+            SELECT id, id_usuario, nextval('task_change_seq') FROM old_rows;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_tombstones AFTER DELETE ON tasks
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION tasks_tombstones()
+    """)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_usuario_change_seq_id',
+            'tasks',
+            ['id_usuario', 'change_seq', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_usuario_change_seq_id',
+            table_name='tasks',
+            postgresql_concurrently=True,
+        )
+    op.execute("DROP TRIGGER tasks_tombstones ON tasks")
+    op.execute("DROP FUNCTION tasks_tombstones()")
+    op.execute("DROP TRIGGER tasks_change_seq ON tasks")
+    op.execute("DROP FUNCTION tasks_change_seq()")
+    op.execute("DROP SEQUENCE task_change_seq")
+    op.drop_column('tasks', 'change_seq')
+    op.drop_index('ix_task_tombstones_usuario_seq_id', table_name='task_tombstones')
+    op.drop_table('task_tombstones')
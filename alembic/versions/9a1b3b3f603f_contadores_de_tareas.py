@@ -0,0 +1,93 @@
+"""contadores de tareas
+
+Revision ID: 9a1b3b3f603f
+Revises: 225d11356021
+Create Date: 2026-10-18 12:41:07.532941
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a1b3b3f603f'
+down_revision: Union[str, Sequence[str], None] = '225d11356021'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_counters',
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('estado', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_usuario'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_usuario', 'estado')
+    )
+    # Triggers por sentencia con tablas de transición: un INSERT o UPDATE de
+    # muchas filas actualiza cada contador una sola vez.
+    op.execute("""
+        CREATE FUNCTION task_counters_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total)
+                SELECT id_usuario, estado, count(*) FROM new_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total)
+                SELECT id_usuario, estado, -count(*) FROM old_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total;
+            ELSE
+                INSERT INTO task_counters AS c (id_usuario, estado, total)
+                SELECT id_usuario, estado, sum(delta) FROM (
+                    SELECT id_usuario, estado, -1 AS delta FROM old_rows
+                    UNION ALL
+                    SELECT id_usuario, estado, 1 AS delta FROM new_rows
+                ) AS cambios
+                GROUP BY id_usuario, estado HAVING sum(delta) <> 0
+                ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_counters_insert AFTER INSERT ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION task_counters_apply()
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_counters_update AFTER UPDATE ON tasks
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION task_counters_apply()
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_counters_delete AFTER DELETE ON tasks
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION task_counters_apply()
+    """)
+    # Los triggers bloquean las escrituras en tasks hasta el commit de la
+    # migración, así que el backfill no pierde cambios concurrentes.
+    op.execute("""
+        INSERT INTO task_counters (id_usuario, estado, total)
+        SELECT id_usuario, estado, count(*) FROM tasks GROUP BY id_usuario, estado
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER tasks_counters_delete ON tasks")
+    op.execute("DROP TRIGGER tasks_counters_update ON tasks")
+    op.execute("DROP TRIGGER tasks_counters_insert ON tasks")
+    op.execute("DROP FUNCTION task_counters_apply()")
+    op.drop_table('task_counters')
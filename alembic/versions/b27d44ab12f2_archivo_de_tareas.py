@@ -0,0 +1,125 @@
+"""archivo de tareas
+
+Revision ID: b27d44ab12f2
+Revises: cb38a113d641
+Create Date: 2026-10-18 12:37:20.914466
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b27d44ab12f2'
+down_revision: Union[str, Sequence[str], None] = 'cb38a113d641'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tasks_archive',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('titulo', sa.String(length=255), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('estado', sa.String(), nullable=False),
+    sa.Column('fecha_creacion', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['id_usuario'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tasks_archive_usuario_fecha_id', 'tasks_archive', ['id_usuario', 'fecha_creacion', 'id'], unique=False)
+    # Archivar borra de tasks con app.archiving = 'on': las tareas siguen
+    # contando en el resumen, pero la versión cambia porque la lista sí cambia.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_counters_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            archiving boolean := coalesce(current_setting('app.archiving', true), '') = 'on';
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, count(*), 1 FROM new_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado,
+                       CASE WHEN archiving THEN 0 ELSE -count(*) END, 1
+                FROM old_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSE
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, sum(delta), 1 FROM (
+                    SELECT id_usuario, estado, -1 AS delta FROM old_rows
+                    UNION ALL
+                    SELECT id_usuario, estado, 1 AS delta FROM new_rows
+                ) AS cambios
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_completadas_updated_at',
+            'tasks',
+            ['updated_at'],
+            unique=False,
+            postgresql_where=sa.text("estado = 'completada'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_completadas_updated_at',
+            table_name='tasks',
+            postgresql_concurrently=True,
+        )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_counters_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, count(*), 1 FROM new_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, -count(*), 1 FROM old_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSE
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, sum(delta), 1 FROM (
+                    SELECT id_usuario, estado, -1 AS delta FROM old_rows
+                    UNION ALL
+                    SELECT id_usuario, estado, 1 AS delta FROM new_rows
+                ) AS cambios
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.drop_index('ix_tasks_archive_usuario_fecha_id', table_name='tasks_archive')
+    op.drop_table('tasks_archive')
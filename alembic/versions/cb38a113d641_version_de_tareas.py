@@ -0,0 +1,98 @@
+"""version de tareas
+
+Revision ID: cb38a113d641
+Revises: 35a4789a103f
+Create Date: 2026-10-18 13:10:54.118460
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cb38a113d641'
+down_revision: Union[str, Sequence[str], None] = '35a4789a103f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Con valores por defecto no volátiles PostgreSQL no reescribe la tabla
+    op.add_column('tasks', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('tasks', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('task_counters', sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+    # Igual que en 9a1b3b3f603f, pero cada sentencia incrementa además la
+    # versión de los contadores que toca, cambie o no el estado.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_counters_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, count(*), 1 FROM new_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, -count(*), 1 FROM old_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSE
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, sum(delta), 1 FROM (
+                    SELECT id_usuario, estado, -1 AS delta FROM old_rows
+                    UNION ALL
+                    SELECT id_usuario, estado, 1 AS delta FROM new_rows
+                ) AS cambios
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_counters_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total)
+                SELECT id_usuario, estado, count(*) FROM new_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total)
+                SELECT id_usuario, estado, -count(*) FROM old_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total;
+            ELSE
+                INSERT INTO task_counters AS c (id_usuario, estado, total)
+                SELECT id_usuario, estado, sum(delta) FROM (
+                    SELECT id_usuario, estado, -1 AS delta FROM old_rows
+                    UNION ALL
+                    SELECT id_usuario, estado, 1 AS delta FROM new_rows
+                ) AS cambios
+                GROUP BY id_usuario, estado HAVING sum(delta) <> 0
+                ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.drop_column('task_counters', 'version')
+    op.drop_column('tasks', 'updated_at')
+    op.drop_column('tasks', 'version')
@@ -0,0 +1,129 @@
+"""borrado en cascada de tareas
+
+Revision ID: de2d911ee8b2
+Revises: 47244d3c5b70
+Create Date: 2026-10-18 13:17:52.502614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'de2d911ee8b2'
+down_revision: Union[str, Sequence[str], None] = '47244d3c5b70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NOT VALID evita recorrer tasks con el bloqueo del ALTER; la validación
+    # posterior no bloquea las escrituras en tasks ni en users
+    op.drop_constraint('tasks_id_usuario_fkey', 'tasks', type_='foreignkey')
+    op.create_foreign_key('tasks_id_usuario_fkey', 'tasks', 'users', ['id_usuario'], ['id'], ondelete='CASCADE', postgresql_not_valid=True)
+    # Al borrar un usuario, sus tareas se borran en cascada después que él: los
+    # contadores y las marcas de borrado de esas tareas se saltan, porque
+    # apuntarían a un usuario que ya no existe y también se borran en cascada
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_counters_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            archiving boolean := coalesce(current_setting('app.archiving', true), '') = 'on';
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, count(*), 1 FROM new_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado,
+                       CASE WHEN archiving THEN 0 ELSE -count(*) END, 1
+                FROM old_rows
+                WHERE EXISTS (SELECT 1 FROM users u WHERE u.id = old_rows.id_usuario)
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSE
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, sum(delta), 1 FROM (
+                    SELECT id_usuario, estado, -1 AS delta FROM old_rows
+                    UNION ALL
+                    SELECT id_usuario, estado, 1 AS delta FROM new_rows
+                ) AS cambios
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_tombstones() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO task_tombstones (id, id_usuario, change_seq)
+            SELECT id, id_usuario, nextval('task_change_seq') FROM old_rows
+            WHERE EXISTS (SELECT 1 FROM users u WHERE u.id = old_rows.id_usuario);
+            RETURN NULL;
+        END;
+        $$
+    """)
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE tasks VALIDATE CONSTRAINT tasks_id_usuario_fkey")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_counters_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            archiving boolean := coalesce(current_setting('app.archiving', true), '') = 'on';
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, count(*), 1 FROM new_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado,
+                       CASE WHEN archiving THEN 0 ELSE -count(*) END, 1
+                FROM old_rows
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            ELSE
+                INSERT INTO task_counters AS c (id_usuario, estado, total, version)
+                SELECT id_usuario, estado, sum(delta), 1 FROM (
+                    SELECT id_usuario, estado, -1 AS delta FROM old_rows
+                    UNION ALL
+                    SELECT id_usuario, estado, 1 AS delta FROM new_rows
+                ) AS cambios
+                GROUP BY id_usuario, estado ORDER BY id_usuario, estado
+                ON CONFLICT (id_usuario, estado)
+                DO UPDATE SET total = c.total + EXCLUDED.total, version = c.version + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_tombstones() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO task_tombstones (id, id_usuario, change_seq)
+            SELECT id, id_usuario, nextval('task_change_seq') FROM old_rows;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.drop_constraint('tasks_id_usuario_fkey', 'tasks', type_='foreignkey')
+    op.create_foreign_key('tasks_id_usuario_fkey', 'tasks', 'users', ['id_usuario'], ['id'])
@@ -0,0 +1,173 @@
+"""Control de admisión: límites de peticiones y descarte de carga.
+
+Cada petición consume un token de la cubeta de su IP y, si trae un token JWT
+válido, de la de su usuario; sin tokens se responde 429 con el tiempo hasta el
+siguiente. Si el pool de conexiones está saturado o hay demasiadas peticiones en
+curso se responde 503 al momento, en lugar de dejar que la petición espere
+``DB_POOL_TIMEOUT`` y alargue la cola de todas las demás.
+"""
+
+import importlib
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+from app.cache import TTLCache
+from app.database import pool_wait_stats
+from app.metrics import Counter, registry
+
+# 0 desactiva el límite correspondiente
+RATE_LIMIT_USER_PER_SECOND = float(os.getenv("RATE_LIMIT_USER_PER_SECOND", "20"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "40"))
+RATE_LIMIT_IP_PER_SECOND = float(os.getenv("RATE_LIMIT_IP_PER_SECOND", "50"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "100"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Ruta "paquete.modulo:Clase" de un RateLimitStore alternativo (p. ej. compartido)
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE")
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "256"))
+# Espera media reciente por una conexión a partir de la cual se descarta carga
+ADMISSION_POOL_WAIT_MS = float(os.getenv("ADMISSION_POOL_WAIT_MS", "200"))
+SHED_RETRY_AFTER_SECONDS = 1
+
+REQUESTS_REJECTED = registry.register(
+    Counter(
+        "http_requests_rejected_total",
+        "Peticiones rechazadas por el control de admisión.",
+        ("reason",),
+    )
+)
+
+
+class RateLimitStore(ABC):
+    """Almacén de cubetas de tokens.
+
+    Una implementación compartida (p. ej. Redis con un script Lua) aplica los
+    límites entre todos los procesos en lugar de por proceso.
+    """
+
+    @abstractmethod
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        """Consume un token de la cubeta ``key``.
+
+        Devuelve 0 si había token o los segundos hasta que haya uno.
+        """
+
+    def stats(self) -> dict[str, Any]:
+        """Métricas propias del almacén."""
+        return {}
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Cubetas en memoria del proceso, acotadas en número de claves.
+
+    Una cubeta que se desaloja o expira vuelve llena, que es el estado al que
+    habría llegado tras ``burst / rate`` segundos sin peticiones.
+    """
+
+    def __init__(self, max_keys: int):
+        self._buckets: TTLCache[tuple[float, float]] = TTLCache(max_keys, 0)
+
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self._buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+            return (1 - tokens) / rate
+        tokens -= 1
+        self._buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+        return 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {"keys": len(self._buckets), "max_keys": self._buckets.maxsize}
+
+
+class RateLimiter:
+    """Límites de peticiones por IP y por usuario sobre un ``RateLimitStore``."""
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        user_rate: float,
+        user_burst: float,
+        ip_rate: float,
+        ip_burst: float,
+    ):
+        self.store = store
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+
+    async def check(
+        self, user_id: int | None, ip: str | None
+    ) -> tuple[str, float] | None:
+        """Devuelve el límite superado y los segundos de espera, o ``None``."""
+        if self.ip_rate > 0 and ip is not None:
+            wait = await self.store.acquire(f"ip:{ip}", self.ip_rate, self.ip_burst)
+            if wait:
+                return "ip", wait
+        if self.user_rate > 0 and user_id is not None:
+            wait = await self.store.acquire(
+                f"user:{user_id}", self.user_rate, self.user_burst
+            )
+            if wait:
+                return "user", wait
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "user_per_second": self.user_rate,
+            "ip_per_second": self.ip_rate,
+            "store": self.store.stats(),
+        }
+
+
+class LoadShedder:
+    """Decide si admitir una petición según la carga del proceso.
+
+    Rechaza si ya hay ``max_in_flight`` peticiones admitidas sin respuesta, o si
+    hay peticiones esperando una conexión del pool y la espera media reciente
+    supera ``pool_wait_threshold`` segundos. Sin esperas en curso vuelve a
+    admitir aunque la media siga alta, así que no se queda rechazando sin
+    nuevas muestras que la bajen.
+    """
+
+    def __init__(self, max_in_flight: int, pool_wait_threshold: float):
+        self.max_in_flight = max_in_flight
+        self.pool_wait_threshold = pool_wait_threshold
+        self.in_flight = 0
+
+    def overloaded(self) -> bool:
+        if 0 < self.max_in_flight <= self.in_flight:
+            return True
+        return (
+            self.pool_wait_threshold > 0
+            and pool_wait_stats.waiting > 0
+            and pool_wait_stats.wait_recent >= self.pool_wait_threshold
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "pool_wait_threshold_ms": self.pool_wait_threshold * 1000,
+        }
+
+
+def load_store() -> RateLimitStore:
+    """Crea el almacén configurado en ``RATE_LIMIT_STORE`` o el de memoria."""
+    if RATE_LIMIT_STORE:
+        module, _, name = RATE_LIMIT_STORE.partition(":")
+        return getattr(importlib.import_module(module), name)()
+    return MemoryRateLimitStore(RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = RateLimiter(
+    load_store(),
+    RATE_LIMIT_USER_PER_SECOND,
+    RATE_LIMIT_USER_BURST,
+    RATE_LIMIT_IP_PER_SECOND,
+    RATE_LIMIT_IP_BURST,
+)
+load_shedder = LoadShedder(ADMISSION_MAX_IN_FLIGHT, ADMISSION_POOL_WAIT_MS / 1000)
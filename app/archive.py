@@ -0,0 +1,211 @@
+"""Archivado de tareas completadas antiguas.
+
+Mueve de ``tasks`` a ``tasks_archive`` las tareas completadas cuya última
+modificación es anterior a ``ARCHIVE_AFTER_DAYS``. Cada lote es una única
+sentencia ``DELETE ... RETURNING`` + ``INSERT`` en su propia transacción, así
+que los bloqueos duran lo que tarda un lote. Las filas que otra transacción
+tiene bloqueadas se saltan y se archivan en la siguiente ejecución. Un lote
+que agota ``ARCHIVE_LOCK_TIMEOUT_MS`` o cae en un interbloqueo se deshace y se
+reintenta hasta ``ARCHIVE_MAX_RETRIES`` veces; cualquier otro error, o agotar
+los reintentos, detiene el archivado. Las purgas se ejecutan igualmente y el
+proceso termina con código distinto de cero.
+
+Después purga las marcas de tareas eliminadas de ``task_tombstones`` más
+antiguas que ``TOMBSTONE_RETENTION_DAYS`` y los tokens de refresco caducados.
+
+Uso:
+    python -m app.archive --older-than-days 30 --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import cast
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import response_cache
+from app.database import AsyncSessionLocal
+from app.models.refresh_token import RefreshToken
+from app.models.task import Task
+from app.models.task_archive import TaskArchive
+from app.models.task_tombstone import TaskTombstone
+
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+# Espera máxima por un bloqueo antes de abortar el lote
+ARCHIVE_LOCK_TIMEOUT_MS = int(os.getenv("ARCHIVE_LOCK_TIMEOUT_MS", "2000"))
+# Reintentos seguidos de un lote fallido antes de dejar el archivado
+ARCHIVE_MAX_RETRIES = int(os.getenv("ARCHIVE_MAX_RETRIES", "3"))
+ARCHIVE_RETRY_SECONDS = 1.0
+# lock_not_available y deadlock_detected: el lote se puede reintentar
+RETRYABLE_SQLSTATES = {"55P03", "40P01"}
+# Los tokens de sincronización más antiguos dejan de aceptarse
+TOMBSTONE_RETENTION_DAYS = float(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+
+ARCHIVE_FIELDS = [
+    column.name
+    for column in TaskArchive.__table__.columns
+    if column.name != "archived_at"
+]
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+    """Archiva un lote y devuelve cuántas tareas movió."""
+    # El lock por usuario de los triggers de change_seq se toma aquí sin esperar
+    # y antes que los de las filas: si una petición del usuario tiene sus
+    # tareas a medio escribir, se saltan en lugar de arriesgar un interbloqueo
+    candidates = (
+        select(Task.id)
+        .where(
+            Task.estado == "completada",
+            Task.updated_at < cutoff,
+            func.pg_try_advisory_xact_lock(func.hashtext("tasks"), Task.id_usuario),
+        )
+        .order_by(Task.updated_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    moved = (
+        delete(Task)
+        .where(Task.id.in_(candidates.scalar_subquery()))
+        .returning(*(getattr(Task, field) for field in ARCHIVE_FIELDS))
+        .cte("moved")
+    )
+    stmt = (
+        insert(TaskArchive)
+        .from_select(ARCHIVE_FIELDS, select(*moved.c))
+        .returning(TaskArchive.id_usuario)
+        .add_cte(moved, nest_here=True)
+    )
+    try:
+        # Los triggers de tasks no descuentan las tareas archivadas del resumen
+        await db.execute(
+            select(
+                func.set_config("app.archiving", "on", True),
+                func.set_config("lock_timeout", str(ARCHIVE_LOCK_TIMEOUT_MS), True),
+            )
+        )
+        # id_usuario es NOT NULL en tasks_archive
+        user_ids = cast(list[int], list((await db.scalars(stmt)).all()))
+        await db.commit()
+    except DBAPIError:
+        await db.rollback()
+        raise
+    logger.info("Archivadas %d tareas", len(user_ids))
+    # Solo alcanza a la caché de este proceso; la de los workers de la API
+    # caduca como mucho en RESPONSE_CACHE_TTL_SECONDS
+    for user_id in set(user_ids):
+        await response_cache.invalidate(user_id)
+    return len(user_ids)
+
+
+async def archive_completed(
+    older_than: timedelta = timedelta(days=ARCHIVE_AFTER_DAYS),
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = 0.0,
+) -> int:
+    """Archiva por lotes hasta agotar las candidatas; devuelve cuántas movió.
+
+    El corte se calcula al empezar para que el trabajo termine aunque sigan
+    completándose tareas mientras corre. Solo se reintentan los lotes que
+    fallan por bloqueos; si uno falla más de ``ARCHIVE_MAX_RETRIES`` veces
+    seguidas, o por otro motivo, se propaga el error.
+    """
+    cutoff = datetime.now(timezone.utc) - older_than
+    total = 0
+    failures = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            try:
+                moved = await archive_batch(db, cutoff, batch_size)
+            except DBAPIError as exc:
+                if getattr(exc.orig, "sqlstate", None) not in RETRYABLE_SQLSTATES:
+                    raise
+                failures += 1
+                if failures > ARCHIVE_MAX_RETRIES:
+                    logger.error(
+                        "Archivado detenido tras %d intentos fallidos: %s",
+                        failures,
+                        exc.orig,
+                    )
+                    raise
+                logger.warning("Lote de archivado deshecho, se reintenta: %s", exc.orig)
+                await asyncio.sleep(ARCHIVE_RETRY_SECONDS)
+                continue
+            failures = 0
+            total += moved
+            if moved < batch_size:
+                return total
+            await asyncio.sleep(pause)
+
+
+async def purge_tombstones(
+    older_than: timedelta = timedelta(days=TOMBSTONE_RETENTION_DAYS),
+) -> int:
+    """Borra las marcas de tareas eliminadas anteriores a ``older_than``."""
+    cutoff = datetime.now(timezone.utc) - older_than
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(TaskTombstone).where(TaskTombstone.deleted_at < cutoff)
+        )
+        await db.commit()
+    return result.rowcount
+
+
+async def purge_refresh_tokens() -> int:
+    """Borra los tokens de refresco caducados, usados o no."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(RefreshToken).where(RefreshToken.expires_at < func.now())
+        )
+        await db.commit()
+    return result.rowcount
+
+
+async def run(args: argparse.Namespace) -> tuple[int, int, int]:
+    """Archiva y purga; las purgas corren aunque el archivado falle.
+
+    Si el archivado falló, el error se propaga después de las purgas.
+    """
+    try:
+        archived = await archive_completed(
+            timedelta(days=args.older_than_days), args.batch_size, args.pause
+        )
+    finally:
+        purged = await purge_tombstones(timedelta(days=args.tombstone_days))
+        tokens = await purge_refresh_tokens()
+        logger.info(
+            "Purgadas %d marcas de borrado y %d tokens de refresco", purged, tokens
+        )
+    return archived, purged, tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--older-than-days", type=float, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.0, help="segundos entre lotes")
+    parser.add_argument(
+        "--tombstone-days", type=float, default=TOMBSTONE_RETENTION_DAYS
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        archived, purged, tokens = asyncio.run(run(args))
+    except DBAPIError:
+        logger.exception("El archivado ha fallado")
+        sys.exit(1)
+    print(
+        f"{archived} tareas archivadas, {purged} marcas de borrado purgadas, "
+        f"{tokens} tokens de refresco caducados borrados"
+    )
+
+
+if __name__ == "__main__":
+    main()
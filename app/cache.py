@@ -0,0 +1,272 @@
+"""Cachés en memoria del proceso y caché de respuestas por usuario."""
+
+import importlib
+import itertools
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, NamedTuple, TypeVar
+from pydantic_core import from_json, to_json
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Caché LRU acotada en número de entradas y con expiración por entrada.
+
+    Con ``maxbytes`` y ``sizeof`` también se acota la suma del tamaño de los
+    valores. No es segura entre hilos: está pensada para usarse desde el event
+    loop.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        maxbytes: int | None = None,
+        sizeof: Callable[[V], int] | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._sizeof = sizeof
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _size(self, value: V) -> int:
+        return self._sizeof(value) if self._sizeof is not None else 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, value = self._data.pop(key)
+        self.bytes -= self._size(value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> V | None:
+        """Devuelve el valor si existe y no ha expirado."""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: float | None = None) -> None:
+        """Guarda un valor, desalojando las entradas menos usadas si hace falta."""
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        size = self._size(value)
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self.bytes += size
+        while len(self._data) > self.maxsize or (
+            self.maxbytes is not None and self.bytes > self.maxbytes
+        ):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """Elimina una entrada si existe."""
+        if key in self._data:
+            self._remove(key)
+
+    def discard_where(self, predicate: Callable[[V], bool]) -> None:
+        """Elimina todas las entradas cuyo valor cumple el predicado."""
+        for key in [k for k, (_, v) in self._data.items() if predicate(v)]:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """Vacía la caché sin reiniciar los contadores."""
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Contadores de uso de la caché."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "maxbytes": self.maxbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# --------------------------
+# Caché de respuestas
+# --------------------------
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 << 20)))
+# Ruta "paquete.modulo:Clase" de un CacheBackend alternativo (p. ej. compartido)
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND")
+
+
+class CacheBackend(ABC):
+    """Almacén de bytes para la caché de respuestas.
+
+    Una implementación compartida (Redis, memcached...) permite que varios
+    procesos vean las invalidaciones de los demás.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Devuelve el valor guardado o ``None``."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Guarda un valor durante ``ttl`` segundos."""
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        """Incrementa un contador y devuelve el valor nuevo.
+
+        No debe devolver nunca un valor ya usado para la misma clave, aunque
+        el contador se haya desalojado.
+        """
+
+    def stats(self) -> dict[str, Any]:
+        """Métricas propias del almacén."""
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Almacén LRU en memoria del proceso, acotado en entradas y en bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self._cache: TTLCache[bytes] = TTLCache(
+            max_entries, ttl, maxbytes=max_bytes, sizeof=len
+        )
+        # Un único contador para todas las claves garantiza que una generación
+        # desalojada nunca vuelva a tomar un valor anterior
+        self._counter = itertools.count(1)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def incr(self, key: str) -> int:
+        value = next(self._counter)
+        self._cache.set(key, str(value).encode())
+        return value
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+
+class CachedResponse(NamedTuple):
+    """Cuerpo y encabezados de una respuesta cacheada."""
+
+    body: bytes
+    headers: dict[str, str]
+
+    def encode(self) -> bytes:
+        return to_json(self.headers) + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, raw: bytes) -> "CachedResponse":
+        headers, _, body = raw.partition(b"\n")
+        return cls(body, from_json(headers))
+
+
+class ResponseCache:
+    """Caché de respuestas por usuario invalidada por generaciones.
+
+    Cada clave incluye la generación vigente del usuario. Invalidar solo
+    incrementa la generación, así que las respuestas anteriores dejan de
+    encontrarse sin recorrerlas. Una lectura que empezó antes de una escritura
+    guarda su resultado bajo la generación vieja y nunca se sirve.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    async def _generation(self, user_id: int) -> int:
+        key = f"gen:{user_id}"
+        raw = await self.backend.get(key)
+        if raw is None:
+            return await self.backend.incr(key)
+        return int(raw)
+
+    async def get(
+        self, user_id: int, name: str
+    ) -> tuple[str | None, CachedResponse | None]:
+        """Busca una respuesta del usuario.
+
+        Devuelve la clave con la que guardar la respuesta si no estaba; la
+        clave fija la generación leída antes de consultar la base de datos.
+        """
+        if not self.enabled:
+            return None, None
+        key = f"resp:{user_id}:{await self._generation(user_id)}:{name}"
+        raw = await self.backend.get(key)
+        if raw is None:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        return key, CachedResponse.decode(raw)
+
+    async def set(self, key: str | None, response: CachedResponse) -> None:
+        """Guarda una respuesta bajo una clave devuelta por ``get``."""
+        if key is not None:
+            await self.backend.set(key, response.encode(), self.ttl)
+
+    async def invalidate(self, user_id: int) -> None:
+        """Descarta todas las respuestas cacheadas del usuario."""
+        if self.enabled:
+            await self.backend.incr(f"gen:{user_id}")
+
+    def stats(self) -> dict[str, Any]:
+        """Aciertos de la caché y métricas del almacén."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "backend": self.backend.stats(),
+        }
+
+
+def load_backend() -> CacheBackend:
+    """Crea el almacén configurado en ``RESPONSE_CACHE_BACKEND`` o el de memoria."""
+    if RESPONSE_CACHE_BACKEND:
+        module, _, name = RESPONSE_CACHE_BACKEND.partition(":")
+        return getattr(importlib.import_module(module), name)()
+    return MemoryCacheBackend(
+        RESPONSE_CACHE_MAX_ENTRIES,
+        RESPONSE_CACHE_MAX_BYTES,
+        RESPONSE_CACHE_TTL_SECONDS,
+    )
+
+
+response_cache = ResponseCache(load_backend(), RESPONSE_CACHE_TTL_SECONDS)
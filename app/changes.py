@@ -0,0 +1,221 @@
+"""Difusión de cambios de tareas a los clientes conectados.
+
+Los triggers de ``tasks`` publican cada fila modificada con ``NOTIFY`` en el
+canal ``task_changes``. Cada proceso abre una sola conexión ``LISTEN``,
+independiente del pool, y reparte las notificaciones a los suscriptores del
+usuario afectado.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+from typing import Any
+import asyncpg
+from fastapi import HTTPException, status
+from sqlalchemy.engine import make_url
+from app.database import DATABASE_URL
+from app.metrics import CallbackMetric, registry
+
+CHANNEL = "task_changes"
+CONNECTION_ERRORS = (OSError, asyncpg.PostgresError, asyncpg.InterfaceError)
+FEED_MAX_SUBSCRIBERS = int(os.getenv("FEED_MAX_SUBSCRIBERS", "1000"))
+FEED_MAX_SUBSCRIBERS_PER_USER = int(os.getenv("FEED_MAX_SUBSCRIBERS_PER_USER", "5"))
+# Eventos pendientes por suscriptor antes de pedirle que se resincronice
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", "100"))
+FEED_HEARTBEAT_SECONDS = float(os.getenv("FEED_HEARTBEAT_SECONDS", "15"))
+FEED_RECONNECT_SECONDS = 1.0
+
+# Evento que indica al cliente que perdió cambios y debe volver a leer la lista
+RESYNC = {"op": "resync"}
+
+logger = logging.getLogger(__name__)
+
+
+def listen_dsn() -> str:
+    """DSN de asyncpg equivalente a ``DATABASE_URL``."""
+    url = make_url(DATABASE_URL).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+class Subscriber:
+    """Cola acotada de eventos de un cliente conectado.
+
+    Si el cliente no consume al ritmo de los cambios, la cola se vacía y se
+    deja un único evento ``resync`` en lugar de acumular memoria.
+    """
+
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize)
+
+    def push(self, event: dict[str, Any]) -> bool:
+        """Encola un evento; devuelve ``False`` si hubo que pedir resync."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+
+class ChangeFeed:
+    """Conexión ``LISTEN`` compartida y suscriptores por usuario.
+
+    La conexión se abre con el primer suscriptor y se reabre si se cae; los
+    suscriptores reciben entonces un ``resync`` porque pudieron perder eventos.
+    """
+
+    def __init__(self, dsn: str, max_subscribers: int, max_per_user: int):
+        self.dsn = dsn
+        self.max_subscribers = max_subscribers
+        self.max_per_user = max_per_user
+        self._subscribers: dict[int, set[Subscriber]] = {}
+        self._count = 0
+        self._task: asyncio.Task | None = None
+        self._connected: asyncio.Event | None = None
+        self.resyncs = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def check_capacity(self, user_id: int) -> None:
+        """Lanza 503 si no se admiten más suscriptores para el usuario."""
+        per_user = len(self._subscribers.get(user_id, ()))
+        if self._count >= self.max_subscribers or per_user >= self.max_per_user:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Demasiadas suscripciones abiertas",
+                headers={"Retry-After": "5"},
+            )
+
+    def subscribe(self, user_id: int) -> Subscriber:
+        """Registra un suscriptor o lanza 503 si se alcanzó algún límite."""
+        self.check_capacity(user_id)
+        subscriber = Subscriber(user_id, FEED_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(subscriber)
+        self._count += 1
+        if self._task is None or self._task.done():
+            self._connected = asyncio.Event()
+            self._task = asyncio.create_task(self._listen(self._connected))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        per_user = self._subscribers.get(subscriber.user_id)
+        if per_user is None or subscriber not in per_user:
+            return
+        per_user.discard(subscriber)
+        self._count -= 1
+        if not per_user:
+            del self._subscribers[subscriber.user_id]
+
+    async def wait_connected(self, timeout: float | None = None) -> None:
+        """Espera a que la conexión ``LISTEN`` esté activa."""
+        assert self._connected is not None, "sin suscriptores"
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    def _dispatch(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        event = json.loads(payload)
+        for subscriber in self._subscribers.get(event["id_usuario"], ()):
+            if not subscriber.push(event):
+                self.resyncs += 1
+
+    def _resync_all(self) -> None:
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                subscriber.push(RESYNC)
+                self.resyncs += 1
+
+    async def _listen(self, connected: asyncio.Event) -> None:
+        """Mantiene la conexión mientras haya suscriptores."""
+        reconnecting = False
+        while self._count:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except CONNECTION_ERRORS as exc:
+                logger.warning("No se pudo abrir la conexión LISTEN: %s", exc)
+                reconnecting = True
+                await asyncio.sleep(FEED_RECONNECT_SECONDS)
+                continue
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(CHANNEL, self._dispatch)
+                # Mientras no había conexión pudieron perderse eventos
+                if reconnecting:
+                    self._resync_all()
+                connected.set()
+                while self._count and not closed.is_set():
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(closed.wait(), FEED_HEARTBEAT_SECONDS)
+            except CONNECTION_ERRORS as exc:
+                logger.warning("Conexión LISTEN perdida: %s", exc)
+            finally:
+                connected.clear()
+                if not connection.is_closed():
+                    await connection.close()
+            reconnecting = True
+
+    async def close(self) -> None:
+        """Cierra la conexión ``LISTEN`` (al apagar la aplicación)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "subscribers": self._count,
+            "users": len(self._subscribers),
+            "connected": self._connected is not None and self._connected.is_set(),
+            "resyncs": self.resyncs,
+        }
+
+
+change_feed = ChangeFeed(
+    listen_dsn(), FEED_MAX_SUBSCRIBERS, FEED_MAX_SUBSCRIBERS_PER_USER
+)
+registry.register(
+    CallbackMetric(
+        "task_feed_subscribers",
+        "Clientes suscritos al flujo de cambios de tareas.",
+        lambda: len(change_feed),
+        "gauge",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "task_feed_resyncs_total",
+        "Eventos resync enviados por colas llenas o reconexiones.",
+        lambda: change_feed.resyncs,
+        "counter",
+    )
+)
+
+
+async def event_stream(user_id: int):
+    """Eventos SSE del usuario, con comentarios periódicos de keep-alive.
+
+    La suscripción se crea al empezar a enviar la respuesta, de modo que el
+    ``finally`` que la elimina siempre llega a ejecutarse.
+    """
+    subscriber = change_feed.subscribe(user_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), FEED_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {event['op']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        change_feed.unsubscribe(subscriber)
@@ -1,21 +1,310 @@
 """Configuración de la base de datos y sesión asíncrona"""
 
+import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.cache import TTLCache
+from app.metrics import (
+    DB_STATEMENT_DURATION,
+    DB_STATEMENT_ERRORS,
+    CallbackMetric,
+    registry,
+)
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Lee una variable de entorno booleana."""
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql+asyncpg://todo_user:todo_password@db:5432/todo_db",
 )
+# Réplica de solo lectura opcional para listados y consultas de usuario
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+# Tras escribir, las lecturas del usuario van al primario durante este tiempo
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# Tras un fallo de conexión, la réplica no se vuelve a intentar en este tiempo
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+DB_ECHO = env_bool("DB_ECHO", False)
+# Conexiones por proceso: pool_size + max_overflow. Con varios workers de
+# uvicorn el total debe quedar por debajo de max_connections de PostgreSQL.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", False)
+# 0 desactiva las sentencias preparadas (necesario detrás de pgbouncer en modo
+# transacción)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# 0 = sin límite
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+
+class PoolWaitStats:
+    """Acumula el tiempo de espera para obtener una conexión del pool.
+
+    Incluye el tiempo de abrir una conexión nueva cuando el pool no tiene
+    ninguna libre.
+    """
+
+    # Peso de la última muestra en la media móvil exponencial
+    ALPHA = 0.2
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_recent = 0.0
+        # Checkouts en curso: peticiones esperando una conexión ahora mismo
+        self.waiting = 0
+
+    def record(self, wait: float) -> None:
+        """Registra la espera de un checkout, en segundos."""
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.wait_recent += self.ALPHA * (wait - self.wait_recent)
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Pool de conexiones que mide la espera de cada checkout."""
+
+    def _do_get(self):  # type: ignore
+        start = time.perf_counter()
+        pool_wait_stats.waiting += 1
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_stats.waiting -= 1
+            pool_wait_stats.record(time.perf_counter() - start)
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+
+def connect_args() -> dict[str, Any]:
+    """Argumentos para asyncpg.connect a partir de la configuración."""
+    args: dict[str, Any] = {
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+    }
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    return args
+
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=DB_ECHO,
+    poolclass=InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=connect_args(),
+)
 
 AsyncSessionLocal = async_sessionmaker(
     engine, expire_on_commit=False, class_=AsyncSession
 )
 
+# Mismo tamaño de pool que el primario; sus esperas no entran en pool_wait_stats
+replica_engine = (
+    create_async_engine(
+        DATABASE_REPLICA_URL,
+        echo=DB_ECHO,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args(),
+    )
+    if DATABASE_REPLICA_URL
+    else None
+)
+
+ReplicaSessionLocal = (
+    async_sessionmaker(replica_engine, expire_on_commit=False, class_=AsyncSession)
+    if replica_engine is not None
+    else None
+)
+
+
+SQL_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"})
+
+
+def statement_operation(statement: str) -> str:
+    """Tipo de sentencia para etiquetar métricas sin disparar la cardinalidad."""
+    operation = statement.lstrip()[:6].upper()
+    if operation.startswith("WITH"):
+        return "WITH"
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _observe_statement(conn, cursor, statement, parameters, context, executemany):
+    DB_STATEMENT_DURATION.observe(
+        time.perf_counter() - context._metrics_start, statement_operation(statement)
+    )
+
+
+def _count_statement_error(exception_context):
+    if exception_context.statement is not None:
+        DB_STATEMENT_ERRORS.inc(statement_operation(exception_context.statement))
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """Registra la duración y los errores de las sentencias de un engine."""
+    event.listen(sync_engine, "before_cursor_execute", _start_statement_timer)
+    event.listen(sync_engine, "after_cursor_execute", _observe_statement)
+    event.listen(sync_engine, "handle_error", _count_statement_error)
+
+
+instrument_engine(engine.sync_engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine.sync_engine)
+
+
+class ReplicaRouter:
+    """Decide qué lecturas pueden ir a la réplica.
+
+    Un usuario que acaba de escribir lee del primario durante
+    ``sticky_seconds`` para ver sus propios cambios pese al retraso de la
+    réplica. Si la réplica no acepta conexiones, todas las lecturas van al
+    primario durante ``retry_seconds``. El estado es local a cada proceso.
+    """
+
+    def __init__(self, enabled: bool, sticky_seconds: float, retry_seconds: float):
+        self.enabled = enabled
+        self.retry_seconds = retry_seconds
+        self._recent_writes: TTLCache[bool] = TTLCache(100_000, sticky_seconds)
+        self._down_until = 0.0
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.failures = 0
+
+    def record_write(self, user_id: int) -> None:
+        """Fija las lecturas del usuario al primario durante la ventana."""
+        if self.enabled:
+            self._recent_writes.set(user_id, True)
+
+    def mark_down(self) -> None:
+        """Desvía las lecturas al primario tras un fallo de la réplica."""
+        self.failures += 1
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    def use_replica(self, user_id: int | None) -> bool:
+        use = (
+            self.enabled
+            and time.monotonic() >= self._down_until
+            and (user_id is None or self._recent_writes.get(user_id) is None)
+        )
+        if use:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+        return use
+
+    def stats(self) -> dict[str, Any]:
+        """Contadores de lecturas por destino y fallos de la réplica."""
+        return {
+            "enabled": self.enabled,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "failures": self.failures,
+            "down": time.monotonic() < self._down_until,
+        }
+
+
+replica_router = ReplicaRouter(
+    ReplicaSessionLocal is not None, REPLICA_STICKY_SECONDS, REPLICA_RETRY_SECONDS
+)
+
+
+def pool_stats() -> dict[str, Any]:
+    """Estado actual del pool de conexiones y tiempos de espera."""
+    pool = engine.pool
+    checkouts = pool_wait_stats.checkouts
+    return {
+        "size": pool.size(),  # type: ignore
+        "checked_out": pool.checkedout(),  # type: ignore
+        "checked_in": pool.checkedin(),  # type: ignore
+        # SQLAlchemy reporta un overflow negativo mientras no se llena el pool
+        "overflow": max(pool.overflow(), 0),  # type: ignore
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        "wait_avg_ms": (
+            pool_wait_stats.wait_total / checkouts * 1000 if checkouts else 0.0
+        ),
+        "wait_max_ms": pool_wait_stats.wait_max * 1000,
+        "wait_recent_ms": pool_wait_stats.wait_recent * 1000,
+        "waiting": pool_wait_stats.waiting,
+    }
+
+
+# Se leen al exportar /metrics, sin coste por petición
+POOL_METRICS = {
+    "db_pool_size": ("size", "gauge", "Conexiones permanentes del pool."),
+    "db_pool_checked_out": ("checked_out", "gauge", "Conexiones del pool en uso."),
+    "db_pool_overflow": (
+        "overflow",
+        "gauge",
+        "Conexiones abiertas por encima del tamaño del pool.",
+    ),
+    "db_pool_checkouts_total": (
+        "checkouts",
+        "counter",
+        "Conexiones obtenidas del pool.",
+    ),
+}
+for _name, (_key, _kind, _documentation) in POOL_METRICS.items():
+    registry.register(
+        CallbackMetric(_name, _documentation, lambda key=_key: pool_stats()[key], _kind)
+    )
+registry.register(
+    CallbackMetric(
+        "db_pool_wait_seconds_total",
+        "Tiempo total esperando una conexión del pool.",
+        lambda: pool_wait_stats.wait_total,
+        "counter",
+    )
+)
+
 
 async def async_session():
     """Proporciona una sesión asíncrona"""
     async with AsyncSessionLocal() as session:
         yield session
+
+
+@asynccontextmanager
+async def read_session(user_id: int | None = None) -> AsyncIterator[AsyncSession]:
+    """Sesión para lecturas: la réplica si procede, si no el primario.
+
+    La conexión a la réplica se abre de inmediato para poder caer al primario
+    si no responde; las consultas posteriores ya no se reintentan.
+    """
+    if ReplicaSessionLocal is not None and replica_router.use_replica(user_id):
+        async with ReplicaSessionLocal() as session:
+            try:
+                await session.connection()
+            except (OSError, DBAPIError, asyncio.TimeoutError):
+                replica_router.mark_down()
+            else:
+                yield session
+                return
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -0,0 +1,44 @@
+"""ETags para las lecturas y escrituras condicionales de tareas."""
+
+import hashlib
+from typing import Any
+from uuid import UUID
+
+
+def task_etag(task: Any) -> str:
+    """ETag fuerte de una tarea: cambia con cada actualización."""
+    return f'"{task.id}.{task.version}"'
+
+
+def collection_etag(user_id: int, version: int, query: str) -> str:
+    """ETag de una lista de tareas del usuario para unos parámetros dados."""
+    params = hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+    return f'"{user_id}.{version}.{params}"'
+
+
+def _candidates(header: str) -> list[str]:
+    return [candidate.strip() for candidate in header.split(",")]
+
+
+def if_none_match(header: str | None, etag: str) -> bool:
+    """Indica si un If-None-Match coincide con la ETag (comparación débil)."""
+    if header is None:
+        return False
+    candidates = [c.removeprefix("W/") for c in _candidates(header)]
+    return "*" in candidates or etag in candidates
+
+
+def if_match_versions(header: str, task_id: UUID) -> list[int] | None:
+    """Versiones de la tarea aceptadas por un If-Match.
+
+    Devuelve ``None`` para ``*`` (cualquier versión) y una lista vacía si
+    ninguna ETag corresponde a la tarea, en cuyo caso la precondición falla.
+    """
+    versions = []
+    for candidate in _candidates(header):
+        if candidate == "*":
+            return None
+        etag_id, _, version = candidate.strip('"').rpartition(".")
+        if etag_id == str(task_id) and version.isdigit():
+            versions.append(int(version))
+    return versions
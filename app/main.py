@@ -1,38 +1,69 @@
+import atexit
 import logging
+import os
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError, ResponseValidationError
 from starlette.middleware.cors import CORSMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from app.routers import user, task
+from app.admission import load_shedder, rate_limiter
+from app.changes import change_feed
+from app.middleware import AccessLogMiddleware, AdmissionMiddleware, MetricsMiddleware
+from app.routers import internal, metrics, user, task
+
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+
+# Los handlers que escriben en disco y consola corren en un hilo aparte; el
+# event loop solo encola los registros.
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = QueueListener(
+    log_queue, logging.FileHandler("app.log"), logging.StreamHandler()
+)
+log_listener.start()
+atexit.register(log_listener.stop)
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler(),
-    ],
+    handlers=[QueueHandler(log_queue)],
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="TODO API con FastAPI y PostgreSQL")
+# El log de acceso ya es JSON: se escribe sin el prefijo del formato general
+access_logger = logging.getLogger("app.access")
+access_logger.propagate = False
+access_logger.setLevel(logging.INFO)
+access_logger.addHandler(QueueHandler(log_queue))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await change_feed.close()
+
 
+app = FastAPI(title="TODO API con FastAPI y PostgreSQL", lifespan=lifespan)
+
+# Dentro de CORS para que los navegadores puedan leer los 429 y 503
+app.add_middleware(
+    AdmissionMiddleware, rate_limiter=rate_limiter, load_shedder=load_shedder
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"Request: {request.method} {request.url}")
-    response = await call_next(request)
-    logger.info("Response status: %d", response.status_code)
-    return response
+app.add_middleware(
+    AccessLogMiddleware, logger=access_logger, sample_rate=ACCESS_LOG_SAMPLE_RATE
+)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(RequestValidationError)
@@ -63,8 +94,11 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=exc.headers,
     )
 
 
 app.include_router(user.router, prefix="/users", tags=["users"])
 app.include_router(task.router, prefix="/tasks", tags=["tasks"])
+app.include_router(internal.router, prefix="/internal", tags=["internal"])
+app.include_router(metrics.router)
@@ -0,0 +1,209 @@
+"""Métricas en formato de texto de Prometheus.
+
+Implementación mínima sin dependencias: contadores, gauges e histogramas con
+etiquetas. Registrar una observación es una búsqueda en un diccionario, una
+bisección sobre los límites y unas sumas bajo un lock, así que puede quedar
+activa en producción. Los valores acumulados de los buckets se calculan al
+exportar, no al observar.
+"""
+
+import bisect
+import threading
+from typing import Callable, Iterable, TypeVar
+
+LabelValues = tuple[str, ...]
+
+M = TypeVar("M", bound="Metric")
+
+# Límites por defecto del cliente oficial de Prometheus, en segundos
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base de las métricas: nombre, ayuda, tipo y nombres de etiquetas."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = (
+            f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        )
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(Metric):
+    """Contador monótono por combinación de etiquetas."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """Valor que sube y baja por combinación de etiquetas."""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackMetric(Metric):
+    """Métrica sin etiquetas cuyo valor se lee al exportar."""
+
+    def __init__(
+        self, name: str, documentation: str, func: Callable[[], float], kind: str
+    ):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self._func = func
+
+    def samples(self) -> Iterable[str]:
+        yield f"{self.name} {_number(self._func())}"
+
+
+class Histogram(Metric):
+    """Histograma de observaciones por combinación de etiquetas."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: cuentas por bucket (la última es +Inf) y suma
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            item = self._values.get(labels)
+            if item is None:
+                item = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            item[0][index] += 1
+            item[1][0] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = [
+                (labels, list(counts), total[0])
+                for labels, (counts, total) in self._values.items()
+            ]
+        bounds = [*self.buckets, float("inf")]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield (
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} "
+                    f"{cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {_number(total)}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+class Registry:
+    """Conjunto de métricas exportadas por ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics)
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Duración de las peticiones HTTP por ruta y estado.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.register(
+    Gauge(
+        "http_requests_in_flight",
+        "Peticiones HTTP en curso.",
+        ("method",),
+    )
+)
+DB_STATEMENT_DURATION = registry.register(
+    Histogram(
+        "db_statement_duration_seconds",
+        "Duración de las sentencias SQL por tipo.",
+        ("operation",),
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5),
+    )
+)
+DB_STATEMENT_ERRORS = registry.register(
+    Counter(
+        "db_statement_errors_total",
+        "Sentencias SQL que terminaron con error.",
+        ("operation",),
+    )
+)
+TOKEN_REFRESHES = registry.register(
+    Counter(
+        "auth_token_refreshes_total",
+        "Renovaciones de token por resultado (ok, invalid, reuse).",
+        ("result",),
+    )
+)
+PASSWORD_HASH_DURATION = registry.register(
+    Histogram(
+        "password_hash_duration_seconds",
+        "Duración de calcular o verificar un hash bcrypt.",
+        ("operation",),
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    )
+)
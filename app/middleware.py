@@ -0,0 +1,192 @@
+"""Middlewares ASGI de la aplicación."""
+
+import json
+import logging
+import math
+import random
+import time
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.admission import REQUESTS_REJECTED, SHED_RETRY_AFTER_SECONDS
+from app.admission import LoadShedder, RateLimiter
+from app.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+from app.utils import auth_cache, decode_access_token
+
+# Rutas de diagnóstico: deben responder justo cuando el servicio está saturado
+ADMISSION_EXEMPT_PATHS = ("/metrics", "/internal/", "/docs", "/openapi.json")
+
+
+def route_template(scope: Scope) -> str:
+    """Plantilla de la ruta resuelta (``/tasks/{task_id}``) o la ruta cruda."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope["path"]
+
+
+class AccessLogMiddleware:
+    """Registra una línea JSON por petición.
+
+    Es un middleware ASGI puro: no envuelve la petición en objetos ``Request``
+    ni la respuesta en un stream como ``BaseHTTPMiddleware``. Con
+    ``sample_rate`` < 1 solo se registra esa fracción de las peticiones,
+    salvo los errores 5xx, que se registran siempre.
+    """
+
+    def __init__(
+        self, app: ASGIApp, logger: logging.Logger, sample_rate: float = 1.0
+    ) -> None:
+        self.app = app
+        self.logger = logger
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if status_code >= 500 or random.random() < self.sample_rate:
+                duration_ms = (time.perf_counter() - start) * 1000
+                self.logger.info(
+                    json.dumps(
+                        {
+                            "ts": datetime.now(timezone.utc).isoformat(),
+                            "method": scope["method"],
+                            "route": route_template(scope),
+                            "status": status_code,
+                            "duration_ms": round(duration_ms, 3),
+                        }
+                    )
+                )
+
+
+class MetricsMiddleware:
+    """Registra la duración de cada petición y las peticiones en curso.
+
+    Las peticiones que no coinciden con ninguna ruta se agrupan como
+    ``unmatched`` para que un escaneo de URLs no multiplique las series.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(method)
+            route = route_template(scope) if "route" in scope else "unmatched"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start, method, route, str(status_code)
+            )
+
+
+def bearer_user_id(scope: Scope) -> int | None:
+    """Usuario del token JWT de la petición, si trae uno válido.
+
+    Consulta primero la caché de ``get_current_user``: un token ya verificado no
+    se vuelve a decodificar en cada petición.
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            identity = auth_cache.get(token)
+            if identity is not None:
+                return identity.id
+            try:
+                user_id: int = decode_access_token(token)["id_usuario"]
+            except HTTPException:
+                return None
+            return user_id
+    return None
+
+
+class AdmissionMiddleware:
+    """Aplica los límites de peticiones y el descarte de carga.
+
+    Las peticiones rechazadas reciben 429 o 503 con ``Retry-After`` sin llegar
+    a la aplicación. Una petición admitida cuenta como en curso hasta que
+    empieza su respuesta, así que los streams largos no ocupan plaza.
+    """
+
+    def __init__(
+        self, app: ASGIApp, rate_limiter: RateLimiter, load_shedder: LoadShedder
+    ) -> None:
+        self.app = app
+        self.rate_limiter = rate_limiter
+        self.load_shedder = load_shedder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(ADMISSION_EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        # Sin límite por usuario no hace falta identificarlo
+        user_id = bearer_user_id(scope) if self.rate_limiter.user_rate > 0 else None
+        limited = await self.rate_limiter.check(user_id, client[0] if client else None)
+        if limited is not None:
+            reason, wait = limited
+            REQUESTS_REJECTED.inc(reason)
+            response = JSONResponse(
+                {"detail": "Demasiadas peticiones"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+        if self.load_shedder.overloaded():
+            REQUESTS_REJECTED.inc("overload")
+            response = JSONResponse(
+                {"detail": "Servicio saturado, reintente más tarde"},
+                status_code=503,
+                headers={"Retry-After": str(SHED_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+
+        shedder = self.load_shedder
+        shedder.in_flight += 1
+        admitted = True
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal admitted
+            if admitted and message["type"] == "http.response.start":
+                admitted = False
+                shedder.in_flight -= 1
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if admitted:
+                shedder.in_flight -= 1
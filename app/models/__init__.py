@@ -2,3 +2,7 @@
 from .base import Base
 from .user import User
 from .task import Task
+from .task_counter import TaskCounter
+from .task_archive import TaskArchive
+from .task_tombstone import TaskTombstone
+from .refresh_token import RefreshToken
@@ -0,0 +1,30 @@
+"""Modelo de tokens de refresco"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.ids import uuid7
+from app.models.base import Base
+
+
+class RefreshToken(Base):
+    """Token de refresco emitido a un usuario.
+
+    Solo se guarda el SHA-256 del token. Cada uso lo marca con ``used_at`` y
+    emite otro de la misma familia (``family_id``, una por login); presentar
+    un token ya usado revoca la familia entera.
+    """
+
+    __tablename__ = "refresh_tokens"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    id_usuario = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True))
+    revoked_at = Column(DateTime(timezone=True))
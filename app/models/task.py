@@ -1,31 +1,86 @@
 """Modelo de Tarea"""
 
-import uuid
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship, validates
-from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    Index,
+)
+from sqlalchemy.orm import deferred, relationship, validates
+from sqlalchemy.sql import func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from app.ids import uuid7
 from app.models.base import Base
 
+# Configuración de texto de PostgreSQL para indexar y consultar las tareas
+SEARCH_CONFIG = "spanish"
+
 
 class Task(Base):
     """Modelo de Tarea"""
 
     __tablename__ = "tasks"
-    id = Column(
-        UUID(as_uuid=True),
-        primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
-        index=True,
+    __table_args__ = (
+        # Paginación por cursor: cada página es un recorrido de rango del índice
+        Index("ix_tasks_usuario_fecha_id", "id_usuario", "fecha_creacion", "id"),
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        # Candidatas al archivado: solo las completadas, por antigüedad
+        Index(
+            "ix_tasks_completadas_updated_at",
+            "updated_at",
+            postgresql_where=text("estado = 'completada'"),
+        ),
+        # "Mis tareas pendientes": la vista más común no lee las completadas
+        Index(
+            "ix_tasks_pendientes_usuario_fecha_id",
+            "id_usuario",
+            "fecha_creacion",
+            "id",
+            postgresql_where=text("estado = 'pendiente'"),
+        ),
+        # Lista ordenada por última modificación
+        Index("ix_tasks_usuario_updated_id", "id_usuario", "updated_at", "id"),
+        # Sincronización incremental: cambios del usuario desde una posición
+        Index("ix_tasks_usuario_change_seq_id", "id_usuario", "change_seq", "id"),
     )
+    # Ordenado por tiempo para que las inserciones no fragmenten la clave primaria
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     titulo = Column(String(255), nullable=False)
     descripcion = Column(Text, nullable=True)
     estado = Column(String, default="pendiente", nullable=False)
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
-    id_usuario = Column(Integer, ForeignKey("users.id"), nullable=False)
+    id_usuario = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    # Se incrementan en cada UPDATE; la versión forma la ETag de la tarea
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    # Lo asigna un trigger en cada INSERT y UPDATE desde la secuencia
+    # task_change_seq; las tareas anteriores a la columna tienen 0
+    change_seq = Column(BigInteger, server_default="0", nullable=False)
+    # Columna generada por PostgreSQL; diferida para no cargarla en cada consulta
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', titulo), 'A') || "
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', "
+                "coalesce(descripcion, '')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
 
-    owner = relationship("User", back_populates="tasks")
+    # Sin carga perezosa: un acceso no previsto lanza error en lugar de una
+    # consulta por tarea
+    owner = relationship("User", back_populates="tasks", lazy="raise")
 
     @validates("title")
     def validate_title(self, key, value):
@@ -0,0 +1,32 @@
+"""Modelo de tareas archivadas"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+
+class TaskArchive(Base):
+    """Tarea completada que el archivado sacó de ``tasks``.
+
+    Tiene las mismas columnas que ``Task`` más la fecha de archivado y es de
+    solo lectura: las tareas archivadas no se editan ni se borran por la API.
+    """
+
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index(
+            "ix_tasks_archive_usuario_fecha_id", "id_usuario", "fecha_creacion", "id"
+        ),
+    )
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    titulo = Column(String(255), nullable=False)
+    descripcion = Column(Text, nullable=True)
+    estado = Column(String, nullable=False)
+    fecha_creacion = Column(DateTime(timezone=True), nullable=False)
+    id_usuario = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
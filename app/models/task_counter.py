@@ -0,0 +1,22 @@
+"""Modelo de contadores de tareas"""
+
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey
+from app.models.base import Base
+
+
+class TaskCounter(Base):
+    """Número de tareas de un usuario por estado y versión de esas tareas.
+
+    Lo mantienen los triggers de la tabla ``tasks`` en la misma transacción que
+    cada escritura, así que no debe modificarse desde la aplicación.
+    """
+
+    __tablename__ = "task_counters"
+    id_usuario = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    estado = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    # Aumenta con cada sentencia que modifica tareas del usuario en este estado;
+    # la suma por usuario forma la ETag de su lista de tareas
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
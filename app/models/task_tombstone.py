@@ -0,0 +1,28 @@
+"""Modelo de tareas eliminadas para la sincronización incremental"""
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+
+class TaskTombstone(Base):
+    """Marca de una tarea borrada o archivada.
+
+    La escribe el trigger de borrado de ``tasks`` con el siguiente
+    ``change_seq``, para que ``GET /tasks/changes`` informe de la baja. El
+    archivado las purga pasados ``TOMBSTONE_RETENTION_DAYS``.
+    """
+
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        Index("ix_task_tombstones_usuario_seq_id", "id_usuario", "change_seq", "id"),
+    )
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    id_usuario = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
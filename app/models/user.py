@@ -10,9 +10,18 @@ class User(Base):
     """Modelo de Usuario"""
 
     __tablename__ = "users"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
 
-    tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan")
+    # Sin carga perezosa: las tareas se consultan siempre de forma explícita.
+    # Al borrar el usuario las borra PostgreSQL (ON DELETE CASCADE) sin que
+    # la sesión tenga que cargarlas
+    tasks = relationship(
+        "Task",
+        back_populates="owner",
+        cascade="all, delete-orphan",
+        lazy="raise",
+        passive_deletes=True,
+    )
@@ -0,0 +1,56 @@
+"""Cursores opacos para la paginación por conjunto de claves (keyset)."""
+
+import base64
+from datetime import datetime, timezone
+from uuid import UUID
+from fastapi import HTTPException, status
+
+# Token de la primera sincronización: devuelve todas las tareas del usuario
+INITIAL_SYNC_TOKEN = "0"
+
+
+def encode_cursor(key: datetime, task_id: UUID) -> str:
+    """Codifica la posición (clave de orden, id) del último elemento de una página."""
+    raw = f"{key.isoformat()}|{task_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decodifica un cursor generado por ``encode_cursor``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        key, task_id = raw.split("|")
+        return datetime.fromisoformat(key), UUID(task_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido"
+        ) from exc
+
+
+def encode_sync_token(change_seq: int, task_id: UUID) -> str:
+    """Codifica la posición (change_seq, id) del último cambio entregado.
+
+    Incluye la fecha de emisión para detectar tokens más antiguos que las marcas
+    de borrado conservadas.
+    """
+    issued_at = datetime.now(timezone.utc).isoformat()
+    raw = f"{change_seq}|{task_id}|{issued_at}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> tuple[int, UUID, datetime]:
+    """Decodifica un token generado por ``encode_sync_token``.
+
+    ``INITIAL_SYNC_TOKEN`` se decodifica como una posición anterior a todas.
+    """
+    if token == INITIAL_SYNC_TOKEN:
+        return -1, UUID(int=0), datetime.now(timezone.utc)
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        change_seq, task_id, issued_at = raw.split("|")
+        return int(change_seq), UUID(task_id), datetime.fromisoformat(issued_at)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token de sincronización inválido",
+        ) from exc
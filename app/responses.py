@@ -0,0 +1,26 @@
+"""Serialización JSON rápida de las respuestas."""
+
+from typing import Any, Iterable, Protocol
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class _Row(Protocol):
+    def _asdict(self) -> dict[str, Any]: ...
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` que codifica con pydantic-core en lugar de ``json.dumps``."""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def rows_to_json(rows: Iterable[_Row]) -> bytes:
+    """Codifica filas de columnas como una lista JSON de objetos.
+
+    No valida las filas contra ``TaskOut``: vienen de la base de datos, que ya
+    garantiza tipos y restricciones, y pydantic-core las codifica en el mismo
+    formato que el esquema.
+    """
+    return to_json([row._asdict() for row in rows])
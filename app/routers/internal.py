@@ -0,0 +1,29 @@
+"""Rutas internas de diagnóstico."""
+
+from fastapi import APIRouter, Depends
+from app.admission import load_shedder, rate_limiter
+from app.cache import response_cache
+from app.changes import change_feed
+from app.database import pool_stats, replica_router
+from app.utils import auth_cache, hashing_pool, require_internal_token
+
+router = APIRouter(
+    tags=["internal"],
+    dependencies=[Depends(require_internal_token)],
+    include_in_schema=False,
+)
+
+
+@router.get("/stats")
+async def stats_endpoint():
+    """Contadores internos para verificar el comportamiento de las cachés."""
+    return {
+        "auth_cache": auth_cache.stats(),
+        "hashing_pool": hashing_pool.stats(),
+        "db_pool": pool_stats(),
+        "response_cache": response_cache.stats(),
+        "replica": replica_router.stats(),
+        "change_feed": change_feed.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "load_shedding": load_shedder.stats(),
+    }
@@ -0,0 +1,20 @@
+"""Exportación de métricas para Prometheus."""
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.metrics import registry
+from app.utils import require_internal_token
+
+router = APIRouter(
+    tags=["metrics"],
+    dependencies=[Depends(require_internal_token)],
+    include_in_schema=False,
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Métricas del proceso en el formato de texto de Prometheus."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
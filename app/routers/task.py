@@ -1,33 +1,105 @@
 """Rutas para la gestión de tareas."""
 
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Sequence
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi import Response, status
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from sqlalchemy import String, Text, any_, bindparam, column, delete, func, insert
+from sqlalchemy import literal
+from sqlalchemy import Row, Select, tuple_, union_all, update, values
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
-from app.database import async_session
-from app.schemas.task import TaskCreate, TaskUpdate, TaskOut
-from app.models.task import Task
+from app.archive import TOMBSTONE_RETENTION_DAYS
+from app.cache import CachedResponse, response_cache
+from app.changes import change_feed, event_stream
+from app.database import AsyncSessionLocal, async_session, replica_router
+from app.etags import collection_etag, if_match_versions, if_none_match, task_etag
+from app.schemas.task import (
+    ExportFormat,
+    TaskBatchCreate,
+    TaskBatchDelete,
+    TaskBatchResult,
+    TaskBatchUpdate,
+    TaskChanges,
+    TaskCreate,
+    TaskFilters,
+    TaskOut,
+    TaskSort,
+    TaskStatus,
+    TaskSummary,
+    TaskUpdate,
+)
+from app.models.task import SEARCH_CONFIG, Task
+from app.models.task_archive import TaskArchive
+from app.models.task_counter import TaskCounter
+from app.models.task_tombstone import TaskTombstone
 from app.models.user import User
-from app.utils import get_current_user
+from app.pagination import decode_cursor, decode_sync_token, encode_cursor
+from app.pagination import encode_sync_token
+from app.responses import FastJSONResponse, rows_to_json
+from app.utils import async_read_session, get_current_user
 
-router = APIRouter(tags=["tasks"])
+router = APIRouter(tags=["tasks"], default_response_class=FastJSONResponse)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = list(TaskOut.model_fields)
+# Columnas de TaskOut en su orden; las filas se codifican sin pasar por el ORM
+TASK_COLUMNS = tuple(getattr(Task, field) for field in EXPORT_FIELDS)
+ARCHIVE_COLUMNS = tuple(getattr(TaskArchive, field) for field in EXPORT_FIELDS)
 
 # ---------- Operaciones de base de datos ----------
 
 
+async def after_write(user_id: int) -> None:
+    """Se llama tras cada commit que modifica tareas del usuario.
+
+    Descarta sus respuestas cacheadas y fija sus lecturas al primario para que
+    vea sus cambios aunque la réplica vaya retrasada.
+    """
+    replica_router.record_write(user_id)
+    await response_cache.invalidate(user_id)
+
+
+def user_write_lock(user_id: int) -> Any:
+    """Condición que toma el lock de escritura del usuario antes que las filas.
+
+    Es una subconsulta sin correlación, así que PostgreSQL la evalúa una sola
+    vez al empezar la sentencia (``One-Time Filter``), antes de bloquear
+    ninguna fila. Con ello todas las escrituras siguen el mismo orden: lock del
+    usuario, filas de ``tasks`` y contadores en los triggers.
+    """
+    lock = func.pg_advisory_xact_lock(func.hashtext("tasks"), user_id)
+    return select(lock).scalar_subquery().is_not(None)
+
+
 async def create_task(db: AsyncSession, task_in: TaskCreate, user: User) -> Task:
-    """Crea una nueva tarea para el usuario dado."""
-    task = Task(
-        titulo=task_in.titulo,
-        descripcion=task_in.descripcion,
-        estado=task_in.estado.value if task_in.estado is not None else None,
-        id_usuario=user.id,
-    )
-    db.add(task)
+    """Crea una nueva tarea para el usuario dado con un INSERT ... RETURNING."""
+    stmt = (
+        insert(Task)
+        .values(
+            titulo=task_in.titulo,
+            descripcion=task_in.descripcion,
+            estado=(task_in.estado or TaskStatus.PENDIENTE).value,
+            id_usuario=user.id,
+        )
+        .returning(Task)
+    )
     try:
+        task = (await db.scalars(stmt)).one()
         await db.commit()
-        await db.refresh(task)
+        await after_write(user.id)  # type: ignore
         return task
     except SQLAlchemyError as e:
         await db.rollback()
@@ -44,17 +116,211 @@ async def get_task_by_id(db: AsyncSession, task_id: UUID, user: User) -> Task |
     return result.scalar_one_or_none()
 
 
-async def update_task(db: AsyncSession, task: Task, task_in: TaskUpdate) -> Task:
-    """Actualiza una tarea existente con los datos proporcionados."""
-    if task_in.titulo is not None:
-        task.titulo = task_in.titulo  # type: ignore
-    if task_in.descripcion is not None:
-        task.descripcion = task_in.descripcion  # type: ignore
+async def get_archived_task_by_id(
+    db: AsyncSession, task_id: UUID, user: User
+) -> TaskArchive | None:
+    """Obtiene una tarea archivada por su ID si pertenece al usuario."""
+    result = await db.execute(
+        select(TaskArchive).where(
+            TaskArchive.id == task_id, TaskArchive.id_usuario == user.id
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+def task_filters(
+    estado: TaskStatus | None = None,
+    creada_desde: datetime | None = None,
+    creada_hasta: datetime | None = None,
+    prefijo: str | None = Query(None, min_length=1, max_length=255),
+    sort: TaskSort = TaskSort.FECHA_CREACION,
+) -> TaskFilters:
+    """Dependencia con los filtros y el orden de la lista de tareas."""
+    for value in (creada_desde, creada_hasta):
+        if value is not None and value.tzinfo is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Las fechas deben incluir zona horaria",
+            )
+    if creada_desde and creada_hasta and creada_desde >= creada_hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="creada_desde debe ser anterior a creada_hasta",
+        )
+    return TaskFilters(
+        estado=estado,
+        creada_desde=creada_desde,
+        creada_hasta=creada_hasta,
+        prefijo=prefijo,
+        sort=sort,
+    )
+
+
+def filter_clauses(model: Any, filters: TaskFilters) -> list:
+    """Condiciones de ``filters`` sobre ``Task`` o ``TaskArchive``."""
+    clauses = []
+    if filters.estado is not None:
+        # Se escribe como constante en el SQL: con un parámetro, el plan genérico
+        # de la sentencia preparada no podría usar los índices parciales
+        clauses.append(
+            model.estado == literal(filters.estado.value, literal_execute=True)
+        )
+    if filters.creada_desde is not None:
+        clauses.append(model.fecha_creacion >= filters.creada_desde)
+    if filters.creada_hasta is not None:
+        clauses.append(model.fecha_creacion < filters.creada_hasta)
+    if filters.prefijo is not None:
+        clauses.append(model.titulo.istartswith(filters.prefijo, autoescape=True))
+    return clauses
+
+
+def tasks_query(
+    user_id: int,
+    include_archived: bool,
+    after: tuple[Any, ...] | None = None,
+    limit: int | None = None,
+    filters: TaskFilters | None = None,
+) -> Select[Any]:
+    """Tareas del usuario filtradas y ordenadas, opcionalmente con las archivadas.
+
+    El orden es por ``filters.sort`` y después por id. Cada rama recorre el
+    índice que empieza por ``(id_usuario, <clave de orden>)``, hacia atrás si
+    el orden es descendente, con el mismo corte y límite antes de mezclarse.
+    """
+    if filters is None:
+        filters = TaskFilters()
+    key = filters.sort.value.lstrip("-")
+    descending = filters.sort.value.startswith("-")
+    sources: list[tuple[Any, tuple[Any, ...]]] = [(Task, TASK_COLUMNS)]
+    if include_archived:
+        sources.append((TaskArchive, ARCHIVE_COLUMNS))
+    branches = []
+    for model, columns in sources:
+        sort_key = getattr(model, key)
+        query = select(*columns).where(
+            model.id_usuario == user_id, *filter_clauses(model, filters)
+        )
+        if after is not None:
+            position = tuple_(sort_key, model.id)
+            query = query.where(
+                position < tuple_(*after) if descending else position > tuple_(*after)
+            )
+        order = (
+            (sort_key.desc(), model.id.desc()) if descending else (sort_key, model.id)
+        )
+        branches.append(query.order_by(*order).limit(limit))
+    if len(branches) == 1:
+        return branches[0]
+    merged = union_all(*branches).subquery()
+    if descending:
+        order = (merged.c[key].desc(), merged.c.id.desc())
+    else:
+        order = (merged.c[key], merged.c.id)
+    return select(merged).order_by(*order).limit(limit)
+
+
+async def get_task_changes(
+    db: AsyncSession, user: User, after: tuple[int, UUID], limit: int
+) -> tuple[list[Row[Any]], list[UUID], tuple[int, UUID], bool]:
+    """Cambios de las tareas del usuario posteriores a ``after``.
+
+    Devuelve hasta ``limit`` cambios en orden de ``(change_seq, id)``: las
+    tareas creadas o modificadas, los ids eliminados, la posición del último
+    cambio y si quedan más. Cada consulta es un recorrido de rango de su índice
+    ``(id_usuario, change_seq, id)``. La sincronización completa (``after``
+    negativo) no lee las marcas de borrado.
+    """
+    after_seq, after_id = after
+    tasks = (
+        await db.execute(
+            select(*TASK_COLUMNS, Task.change_seq)
+            .where(
+                Task.id_usuario == user.id,
+                tuple_(Task.change_seq, Task.id)
+                > tuple_(literal(after_seq), literal(after_id)),
+            )
+            .order_by(Task.change_seq, Task.id)
+            .limit(limit + 1)
+        )
+    ).all()
+    tombstones: Sequence[Row[Any]] = []
+    if after_seq >= 0:
+        tombstones = (
+            await db.execute(
+                select(TaskTombstone.change_seq, TaskTombstone.id)
+                .where(
+                    TaskTombstone.id_usuario == user.id,
+                    tuple_(TaskTombstone.change_seq, TaskTombstone.id)
+                    > tuple_(literal(after_seq), literal(after_id)),
+                )
+                .order_by(TaskTombstone.change_seq, TaskTombstone.id)
+                .limit(limit + 1)
+            )
+        ).all()
+    changes: list[tuple[int, UUID, Row[Any] | None]] = sorted(
+        [(row.change_seq, row.id, row) for row in tasks]
+        + [(row.change_seq, row.id, None) for row in tombstones],
+        key=lambda change: change[:2],
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    # Tras una sincronización completa vacía se sigue desde 0 para no saltarse
+    # las marcas de borrado de las tareas que se creen después
+    position = changes[-1][:2] if changes else (max(after_seq, 0), after_id)
+    updated = [row for _, _, row in changes if row is not None]
+    deleted = [task_id for _, task_id, row in changes if row is None]
+    return updated, deleted, position, has_more
+
+
+async def get_collection_version(db: AsyncSession, user: User) -> int:
+    """Versión de la lista de tareas del usuario según ``task_counters``."""
+    result = await db.execute(
+        select(func.coalesce(func.sum(TaskCounter.version), 0)).where(
+            TaskCounter.id_usuario == user.id
+        )
+    )
+    return int(result.scalar_one())
+
+
+async def update_task(
+    db: AsyncSession,
+    task_id: UUID,
+    task_in: TaskUpdate,
+    user: User,
+    versions: list[int] | None = None,
+) -> Task | None:
+    """Actualiza una tarea del usuario con un UPDATE ... RETURNING.
+
+    Si se indican ``versions`` solo se actualiza si la versión actual de la
+    tarea es una de ellas. Devuelve ``None`` si la tarea no existe, pertenece a
+    otro usuario o no cumple la versión.
+    """
+    cambios = task_in.model_dump(exclude_none=True)
     if task_in.estado is not None:
-        task.estado = task_in.estado.value  # type: ignore
+        cambios["estado"] = task_in.estado.value
+    if not cambios:
+        task = await get_task_by_id(db, task_id, user)
+        if task is not None and versions is not None and task.version not in versions:
+            return None
+        return task
+    stmt = (
+        update(Task)
+        .where(
+            Task.id == task_id,
+            Task.id_usuario == user.id,
+            user_write_lock(user.id),  # type: ignore
+        )
+        .values(**cambios, version=Task.version + 1, updated_at=func.now())
+        .returning(Task)
+        .execution_options(synchronize_session=False)
+    )
+    if versions is not None:
+        stmt = stmt.where(Task.version.in_(versions))
     try:
+        task = (await db.scalars(stmt)).one_or_none()
         await db.commit()
-        await db.refresh(task)
+        if task is not None:
+            await after_write(user.id)  # type: ignore
         return task
     except SQLAlchemyError as e:
         await db.rollback()
@@ -63,11 +329,28 @@ async def update_task(db: AsyncSession, task: Task, task_in: TaskUpdate) -> Task
         ) from e
 
 
-async def delete_task(db: AsyncSession, task: Task) -> None:
-    """Elimina una tarea existente."""
+async def delete_task(db: AsyncSession, task_id: UUID, user: User) -> bool:
+    """Elimina una tarea del usuario con un DELETE ... RETURNING.
+
+    Devuelve ``False`` si la tarea no existe o pertenece a otro usuario.
+    """
+    stmt = (
+        delete(Task)
+        .where(
+            Task.id == task_id,
+            Task.id_usuario == user.id,
+            user_write_lock(user.id),  # type: ignore
+        )
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
     try:
-        await db.delete(task)
+        deleted = (await db.scalars(stmt)).one_or_none()
         await db.commit()
+        if deleted is None:
+            return False
+        await after_write(user.id)  # type: ignore
+        return True
     except SQLAlchemyError as e:
         await db.rollback()
         raise HTTPException(
@@ -75,54 +358,450 @@ async def delete_task(db: AsyncSession, task: Task) -> None:
         ) from e
 
 
+async def create_tasks(
+    db: AsyncSession, batch: TaskBatchCreate, user: User
+) -> list[Task]:
+    """Crea un lote de tareas con un único INSERT ... RETURNING."""
+    rows = [
+        {
+            "titulo": task_in.titulo,
+            "descripcion": task_in.descripcion,
+            "estado": (task_in.estado or TaskStatus.PENDIENTE).value,
+            "id_usuario": user.id,
+        }
+        for task_in in batch.tareas
+    ]
+    try:
+        # render_nulls evita que SQLAlchemy agrupe las filas en varios INSERT
+        # según qué columnas vienen nulas
+        result = await db.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True),
+            rows,
+            execution_options={"render_nulls": True},
+        )
+        tasks = list(result.all())
+        await db.commit()
+        await after_write(user.id)  # type: ignore
+        return tasks
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"No fue posible crear las tareas: {str(e)}"
+        ) from e
+
+
+async def update_tasks(
+    db: AsyncSession, batch: TaskBatchUpdate, user: User
+) -> dict[UUID, Task]:
+    """Actualiza un lote de tareas con un único UPDATE ... FROM (VALUES ...).
+
+    Solo se modifican las tareas del usuario; los campos nulos conservan su valor.
+    Devuelve las tareas actualizadas indexadas por ID.
+    """
+    cambios = values(
+        column("id", PG_UUID(as_uuid=True)),
+        column("titulo", String),
+        column("descripcion", Text),
+        column("estado", String),
+        name="cambios",
+    ).data(
+        [
+            (
+                item.id,
+                item.titulo,
+                item.descripcion,
+                item.estado.value if item.estado is not None else None,
+            )
+            for item in batch.tareas
+        ]
+    )
+    stmt = (
+        update(Task)
+        .where(
+            Task.id == cambios.c.id,
+            Task.id_usuario == user.id,
+            user_write_lock(user.id),  # type: ignore
+        )
+        .values(
+            titulo=func.coalesce(cambios.c.titulo, Task.titulo),
+            descripcion=func.coalesce(cambios.c.descripcion, Task.descripcion),
+            estado=func.coalesce(cambios.c.estado, Task.estado),
+            version=Task.version + 1,
+            updated_at=func.now(),
+        )
+        .returning(Task)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        tasks = (await db.scalars(stmt)).all()
+        await db.commit()
+        await after_write(user.id)  # type: ignore
+        return {task.id: task for task in tasks}  # type: ignore
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"No fue posible actualizar las tareas: {str(e)}"
+        ) from e
+
+
+async def delete_tasks(
+    db: AsyncSession, batch: TaskBatchDelete, user: User
+) -> set[UUID]:
+    """Elimina un lote de tareas con un único DELETE ... WHERE id = ANY(...).
+
+    Devuelve los IDs efectivamente borrados.
+    """
+    ids = bindparam("ids", list(batch.ids), type_=ARRAY(PG_UUID(as_uuid=True)))
+    stmt = (
+        delete(Task)
+        .where(
+            Task.id == any_(ids),
+            Task.id_usuario == user.id,
+            user_write_lock(user.id),  # type: ignore
+        )
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        deleted = set((await db.scalars(stmt)).all())
+        await db.commit()
+        await after_write(user.id)  # type: ignore
+        return deleted
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"No fue posible borrar las tareas: {str(e)}"
+        ) from e
+
+
+async def stream_tasks(
+    user_id: int, formato: ExportFormat, include_archived: bool = False
+) -> AsyncIterator[str]:
+    """Genera la exportación de las tareas de un usuario por lotes.
+
+    Usa un cursor del lado del servidor, por lo que la memoria no depende del
+    número de tareas. Abre su propia sesión porque las dependencias de la ruta
+    se cierran antes de enviar la respuesta.
+    """
+    query = tasks_query(user_id, include_archived).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+    if formato is ExportFormat.CSV:
+        yield ",".join(EXPORT_FIELDS) + "\r\n"
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            if formato is ExportFormat.CSV:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(to_json(row._asdict()).decode() + "\n" for row in rows)
+
+
+def cached_response(request: Request, cached: CachedResponse) -> Response:
+    """Responde desde la caché, con 304 si el cliente ya tiene esa versión."""
+    if if_none_match(request.headers.get("if-none-match"), cached.headers["ETag"]):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=cached.headers
+        )
+    return Response(cached.body, media_type="application/json", headers=cached.headers)
+
+
 # ---------- Rutas ----------
 
 
 @router.post("/", response_model=TaskOut, status_code=status.HTTP_201_CREATED)
 async def create_task_endpoint(
     task_in: TaskCreate,
+    response: Response,
     db: AsyncSession = Depends(async_session),
     current_user: User = Depends(get_current_user),
 ):
     """Endpoint para crear una tarea para usuarios autenticados."""
-    return await create_task(db, task_in, current_user)
+    task = await create_task(db, task_in, current_user)
+    response.headers["ETag"] = task_etag(task)
+    return task
+
+
+@router.post(
+    "/batch",
+    response_model=list[TaskBatchResult],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_tasks_endpoint(
+    batch: TaskBatchCreate,
+    db: AsyncSession = Depends(async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Endpoint para crear un lote de tareas en una sola transacción."""
+    tasks = await create_tasks(db, batch, current_user)
+    return [TaskBatchResult(id=task.id, ok=True, tarea=task) for task in tasks]  # type: ignore
+
+
+@router.patch("/batch", response_model=list[TaskBatchResult])
+async def update_tasks_endpoint(
+    batch: TaskBatchUpdate,
+    db: AsyncSession = Depends(async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Endpoint para actualizar un lote de tareas en una sola transacción."""
+    updated = await update_tasks(db, batch, current_user)
+    return [
+        (
+            TaskBatchResult(id=item.id, ok=True, tarea=updated[item.id])  # type: ignore
+            if item.id in updated
+            else TaskBatchResult(id=item.id, ok=False, detail="Tarea no encontrada")
+        )
+        for item in batch.tareas
+    ]
+
+
+@router.delete("/batch", response_model=list[TaskBatchResult])
+async def delete_tasks_endpoint(
+    batch: TaskBatchDelete,
+    db: AsyncSession = Depends(async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Endpoint para borrar un lote de tareas en una sola transacción."""
+    deleted = await delete_tasks(db, batch, current_user)
+    return [
+        (
+            TaskBatchResult(id=task_id, ok=True)
+            if task_id in deleted
+            else TaskBatchResult(id=task_id, ok=False, detail="Tarea no encontrada")
+        )
+        for task_id in batch.ids
+    ]
 
 
 @router.get("/", response_model=list[TaskOut])
 async def list_tasks_endpoint(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    include_archived: bool = False,
+    filters: TaskFilters = Depends(task_filters),
+    db: AsyncSession = Depends(async_read_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Endpoint para listar las tareas del usuario autenticado, paginadas por cursor.
+
+    Si quedan más tareas, el cursor de la página siguiente se devuelve en el
+    encabezado ``X-Next-Cursor``; solo es válido con los mismos filtros y orden.
+    Filtra por ``estado``, por el rango ``[creada_desde, creada_hasta)`` de
+    ``fecha_creacion`` y por ``prefijo`` del título, sin distinguir mayúsculas,
+    y ordena según ``sort``. Con ``include_archived`` la lista incluye las
+    tareas archivadas en su posición. Con un ``If-None-Match`` vigente responde 304
+    tras una sola consulta a ``task_counters``, o sin consultas si la página
+    está en la caché de respuestas.
+    """
+    cache_key, cached = await response_cache.get(
+        current_user.id, f"list?{request.url.query}"  # type: ignore
+    )
+    if cached is not None:
+        return cached_response(request, cached)
+
+    # La ETag se calcula antes de leer: si hay una escritura entre ambas
+    # consultas la ETag queda vieja y el siguiente sondeo recibe la lista.
+    version = await get_collection_version(db, current_user)
+    etag = collection_etag(current_user.id, version, request.url.query)  # type: ignore
+    headers = {"ETag": etag, "Vary": "Authorization"}
+    if if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    after = decode_cursor(cursor) if cursor is not None else None
+    query = tasks_query(
+        current_user.id, include_archived, after, limit + 1, filters  # type: ignore
+    )
+    rows = (await db.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        key = filters.sort.value.lstrip("-")
+        headers["X-Next-Cursor"] = encode_cursor(getattr(last, key), last.id)
+    body = rows_to_json(rows)
+    await response_cache.set(cache_key, CachedResponse(body, headers))
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+async def export_tasks_endpoint(
+    formato: ExportFormat = ExportFormat.NDJSON,
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    """Endpoint para exportar todas las tareas del usuario autenticado en streaming."""
+    media_type = {
+        ExportFormat.NDJSON: "application/x-ndjson",
+        ExportFormat.CSV: "text/csv",
+    }[formato]
+    return StreamingResponse(
+        stream_tasks(current_user.id, formato, include_archived),  # type: ignore
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="tareas.{formato.value}"'
+        },
+    )
+
+
+@router.get("/search", response_model=list[TaskOut])
+async def search_tasks_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
     db: AsyncSession = Depends(async_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Endpoint para listar todas las tareas del usuario autenticado."""
-    result = await db.execute(select(Task).where(Task.id_usuario == current_user.id))
-    return result.scalars().all()
+    """Endpoint para buscar texto en el título y la descripción de las tareas.
+
+    Usa el índice GIN de ``search_vector`` y ordena por relevancia; las
+    coincidencias en el título pesan más que en la descripción.
+    """
+    consulta = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    query = (
+        select(Task)
+        .where(
+            Task.id_usuario == current_user.id,
+            Task.search_vector.bool_op("@@")(consulta),
+        )
+        .order_by(func.ts_rank(Task.search_vector, consulta).desc(), Task.id)
+        .limit(limit)
+    )
+    return (await db.execute(query)).scalars().all()
+
+
+@router.get("/summary", response_model=TaskSummary)
+async def task_summary_endpoint(
+    db: AsyncSession = Depends(async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Endpoint para obtener el número de tareas del usuario por estado.
+
+    Lee los contadores que mantienen los triggers de ``tasks``, sin recorrer
+    las tareas.
+    """
+    result = await db.execute(
+        select(TaskCounter.estado, TaskCounter.total).where(
+            TaskCounter.id_usuario == current_user.id
+        )
+    )
+    por_estado = {estado: 0 for estado in TaskStatus}
+    por_estado.update({TaskStatus(estado): total for estado, total in result.all()})
+    return TaskSummary(total=sum(por_estado.values()), por_estado=por_estado)
+
+
+@router.get(
+    "/changes/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def task_change_stream_endpoint(
+    current_user: User = Depends(get_current_user),
+):
+    """Flujo SSE con los cambios de las tareas del usuario autenticado.
+
+    Cada evento lleva ``op`` (``insert``, ``update``, ``delete`` o ``archive``),
+    ``id``, ``version`` y ``estado``. Tras un evento ``resync`` el cliente debe
+    sincronizar de nuevo con ``/tasks/changes`` porque pudo perder cambios.
+    """
+    change_feed.check_capacity(current_user.id)  # type: ignore
+    return StreamingResponse(
+        event_stream(current_user.id),  # type: ignore
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/changes", response_model=TaskChanges)
+async def task_changes_endpoint(
+    since: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(async_read_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Endpoint con los cambios de las tareas del usuario autenticado.
+
+    Devuelve las tareas creadas o modificadas y los ids de las eliminadas o
+    archivadas después del token ``since``, junto con el token siguiente
+    (``since=0`` para la primera sincronización). Si ``hay_mas`` es verdadero
+    se vuelve a pedir con el nuevo token. Un token más antiguo que
+    ``TOMBSTONE_RETENTION_DAYS`` responde 410.
+    """
+    change_seq, task_id, issued_at = decode_sync_token(since)
+    retention = timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    if issued_at < datetime.now(timezone.utc) - retention:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Token de sincronización caducado; sincronice desde since=0",
+        )
+    updated, deleted, position, has_more = await get_task_changes(
+        db, current_user, (change_seq, task_id), limit
+    )
+    return {
+        "tareas": [row._asdict() for row in updated],
+        "eliminadas": deleted,
+        "token": encode_sync_token(*position),
+        "hay_mas": has_more,
+    }
 
 
 @router.get("/{task_id}", response_model=TaskOut)
 async def get_task_endpoint(
     task_id: UUID,
-    db: AsyncSession = Depends(async_session),
+    request: Request,
+    include_archived: bool = False,
+    db: AsyncSession = Depends(async_read_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Endpoint para obtener una tarea específica del usuario autenticado."""
-    task = await get_task_by_id(db, task_id, current_user)
-    if not task:
-        raise HTTPException(status_code=404, detail="Tarea no encontrada")
-    return task
+    """Endpoint para obtener una tarea específica del usuario autenticado.
+
+    Con ``include_archived`` también busca entre las tareas archivadas. Responde
+    304 sin cuerpo si el ``If-None-Match`` coincide con su versión.
+    """
+    cache_key, cached = await response_cache.get(
+        current_user.id, f"task:{task_id}?{include_archived}"  # type: ignore
+    )
+    if cached is None:
+        task: Task | TaskArchive | None = await get_task_by_id(
+            db, task_id, current_user
+        )
+        if task is None and include_archived:
+            task = await get_archived_task_by_id(db, task_id, current_user)
+        if not task:
+            raise HTTPException(status_code=404, detail="Tarea no encontrada")
+        headers = {"ETag": task_etag(task), "Vary": "Authorization"}
+        cached = CachedResponse(
+            TaskOut.model_validate(task).model_dump_json().encode(), headers
+        )
+        await response_cache.set(cache_key, cached)
+    return cached_response(request, cached)
 
 
 @router.put("/{task_id}", response_model=TaskOut)
 async def update_task_endpoint(
     task_id: UUID,
     task_in: TaskUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(async_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Endpoint para actualizar una tarea específica del usuario autenticado."""
-    task = await get_task_by_id(db, task_id, current_user)
+    """Endpoint para actualizar una tarea específica del usuario autenticado.
+
+    Con ``If-Match`` solo se actualiza si la ETag corresponde a la versión
+    actual de la tarea; si no, responde 412.
+    """
+    versions = None if if_match is None else if_match_versions(if_match, task_id)
+    task = await update_task(db, task_id, task_in, current_user, versions)
     if not task:
+        if versions is not None and await get_task_by_id(db, task_id, current_user):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="La tarea fue modificada por otra petición",
+            )
         raise HTTPException(status_code=404, detail="Tarea no encontrada")
-    return await update_task(db, task, task_in)
+    response.headers["ETag"] = task_etag(task)
+    return task
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -132,8 +811,6 @@ async def delete_task_endpoint(
     current_user: User = Depends(get_current_user),
 ):
     """Endpoint para borrar una tarea específica del usuario autenticado."""
-    task = await get_task_by_id(db, task_id, current_user)
-    if not task:
+    if not await delete_task(db, task_id, current_user):
         raise HTTPException(status_code=404, detail="Tarea no encontrada")
-    await delete_task(db, task)
     return None
@@ -1,21 +1,34 @@
 """Rutas para la gestión de usuarios."""
 
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.ids import uuid7
+from app.metrics import TOKEN_REFRESHES
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
-from app.schemas.user import UserCreate, UserOut
-from app.database import async_session
+from app.schemas.user import RefreshRequest, TokenOut, UserCreate, UserOut
+from app.database import async_session, replica_router
 from app.utils import (
-    hash_password,
-    verify_password,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    hash_password_async,
+    hash_refresh_token,
+    new_refresh_token,
+    verify_password_async,
     create_access_token,
 )
 
 router = APIRouter(tags=["Users"])
 
+logger = logging.getLogger(__name__)
+
 
 async def get_user_by_email(email: str, db: AsyncSession) -> User | None:
     """Obtiene un usuario por su email."""
@@ -34,11 +47,15 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(async_session
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email ya registrado"
         )
-    new_user = User(email=user.email, password_hash=hash_password(user.password))
+    new_user = User(
+        email=user.email, password_hash=await hash_password_async(user.password)
+    )
     try:
         db.add(new_user)
+        # El INSERT ya devuelve id y fecha_creacion con RETURNING
         await db.commit()
-        await db.refresh(new_user)
+        # El primer login y las primeras peticiones no dependen de la réplica
+        replica_router.record_write(new_user.id)  # type: ignore
         return new_user
     except Exception as e:
         await db.rollback()
@@ -50,17 +67,131 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(async_session
 # --------------------------
 # Login / obtener JWT
 # --------------------------
-@router.post("/login/")
+async def issue_tokens(
+    db: AsyncSession, user_id: int, family_id: uuid.UUID | None = None
+) -> TokenOut:
+    """Crea un token de acceso y uno de refresco de la familia dada (o nueva).
+
+    Añade el token de refresco a la sesión; el llamador hace el commit.
+    """
+    refresh_token, token_hash = new_refresh_token()
+    db.add(
+        RefreshToken(
+            id_usuario=user_id,
+            family_id=family_id or uuid7(),
+            token_hash=token_hash,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return TokenOut(
+        access_token=create_access_token({"id_usuario": str(user_id)}),
+        refresh_token=refresh_token,
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+
+def invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token de refresco inválido o caducado",
+    )
+
+
+@router.post("/login/", response_model=TokenOut)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(async_session),
 ):
-    """Login de usuario y obtención de token JWT."""
+    """Login de usuario y obtención de token JWT y token de refresco."""
     user = await get_user_by_email(form_data.username, db)
-    if not user or not verify_password(form_data.password, user.password_hash):  # type: ignore
+    if not user or not await verify_password_async(
+        form_data.password, user.password_hash  # type: ignore
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
         )
-    token = create_access_token({"id_usuario": str(user.id)})
-    return {"access_token": token, "token_type": "bearer"}
+    tokens = await issue_tokens(db, user.id)  # type: ignore
+    await db.commit()
+    return tokens
+
+
+# --------------------------
+# Renovación y revocación de tokens
+# --------------------------
+@router.post("/refresh/", response_model=TokenOut)
+async def refresh(body: RefreshRequest, db: AsyncSession = Depends(async_session)):
+    """Cambia un token de refresco por otro y un token de acceso nuevos.
+
+    No verifica la contraseña: cuesta un ``UPDATE`` y un ``INSERT``. El token
+    presentado queda usado; si vuelve a llegar es que alguien más lo tiene, y
+    se revoca toda su familia, incluido el token que se emitió al usarlo.
+    """
+    token_hash = hash_refresh_token(body.refresh_token)
+    now = datetime.now(timezone.utc)
+    # El UPDATE condicionado hace que de dos usos simultáneos solo gane uno
+    result = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(used_at=now)
+        .returning(RefreshToken.id_usuario, RefreshToken.family_id)
+    )
+    rotated = result.one_or_none()
+    if rotated is None:
+        reused = (
+            select(RefreshToken.family_id)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.used_at.is_not(None),
+            )
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == reused, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+            .returning(RefreshToken.id_usuario)
+        )
+        revoked = result.scalars().all()
+        await db.commit()
+        if revoked:
+            logger.warning(
+                "Reutilización de token de refresco del usuario %s; "
+                "revocados %d tokens",
+                revoked[0],
+                len(revoked),
+            )
+        TOKEN_REFRESHES.inc("reuse" if revoked else "invalid")
+        raise invalid_refresh_token()
+
+    user_id, family_id = rotated
+    tokens = await issue_tokens(db, user_id, family_id)
+    await db.commit()
+    TOKEN_REFRESHES.inc("ok")
+    return tokens
+
+
+@router.post("/logout/", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(body: RefreshRequest, db: AsyncSession = Depends(async_session)):
+    """Revoca la familia del token de refresco (la sesión de ese login).
+
+    Los tokens de acceso ya emitidos siguen valiendo hasta que caducan.
+    """
+    family = (
+        select(RefreshToken.family_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(body.refresh_token))
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+    return None
@@ -4,7 +4,9 @@ from typing import Optional
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field, field_validator
+
+MAX_BATCH_SIZE = 500
 
 
 # Esto es para futura escalavilidad
@@ -15,6 +17,32 @@ class TaskStatus(str, Enum):
     COMPLETADA = "completada"
 
 
+class ExportFormat(str, Enum):
+    """Formatos de exportación de tareas."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class TaskSort(str, Enum):
+    """Órdenes admitidos en la lista de tareas; el prefijo ``-`` es descendente."""
+
+    FECHA_CREACION = "fecha_creacion"
+    FECHA_CREACION_DESC = "-fecha_creacion"
+    UPDATED_AT = "updated_at"
+    UPDATED_AT_DESC = "-updated_at"
+
+
+class TaskFilters(BaseModel):
+    """Filtros y orden de la lista de tareas."""
+
+    estado: Optional[TaskStatus] = None
+    creada_desde: Optional[AwareDatetime] = None
+    creada_hasta: Optional[AwareDatetime] = None
+    prefijo: Optional[str] = Field(default=None, min_length=1, max_length=255)
+    sort: TaskSort = TaskSort.FECHA_CREACION
+
+
 class TaskBase(BaseModel):
     """Esquema de tarea base."""
 
@@ -41,4 +69,65 @@ class TaskOut(TaskBase):
     id: UUID
     id_usuario: int
     fecha_creacion: datetime
+    updated_at: datetime
+    version: int
     model_config = ConfigDict(from_attributes=True)
+
+
+class TaskSummary(BaseModel):
+    """Esquema del resumen de tareas por estado."""
+
+    total: int
+    por_estado: dict[TaskStatus, int]
+
+
+class TaskChanges(BaseModel):
+    """Esquema de los cambios de tareas desde un token de sincronización."""
+
+    tareas: list[TaskOut]
+    eliminadas: list[UUID]
+    token: str
+    hay_mas: bool
+
+
+class TaskBatchCreate(BaseModel):
+    """Esquema para crear varias tareas en una sola operación."""
+
+    tareas: list[TaskCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TaskBatchUpdateItem(TaskUpdate):
+    """Esquema para actualizar una tarea dentro de un lote."""
+
+    id: UUID
+
+
+class TaskBatchUpdate(BaseModel):
+    """Esquema para actualizar varias tareas en una sola operación."""
+
+    tareas: list[TaskBatchUpdateItem] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE
+    )
+
+    @field_validator("tareas")
+    @classmethod
+    def validate_unique_ids(cls, value: list[TaskBatchUpdateItem]):
+        """Cada tarea solo puede aparecer una vez en el lote"""
+        if len({item.id for item in value}) != len(value):
+            raise ValueError("Hay tareas repetidas en el lote")
+        return value
+
+
+class TaskBatchDelete(BaseModel):
+    """Esquema para borrar varias tareas en una sola operación."""
+
+    ids: list[UUID] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TaskBatchResult(BaseModel):
+    """Resultado de una operación por lotes para cada tarea."""
+
+    id: UUID
+    ok: bool
+    detail: Optional[str] = None
+    tarea: Optional[TaskOut] = None
@@ -16,6 +16,21 @@ class UserCreate(UserBase):
     password: str = Field(..., min_length=6)
 
 
+class TokenOut(BaseModel):
+    """Esquema de los tokens emitidos al iniciar sesión o renovarlos."""
+
+    access_token: str
+    token_type: str = "bearer"
+    refresh_token: str
+    expires_in: int
+
+
+class RefreshRequest(BaseModel):
+    """Esquema para renovar o revocar un token de refresco."""
+
+    refresh_token: str = Field(..., min_length=1, max_length=255)
+
+
 class UserOut(UserBase):
     """Esquema para la salida de un usuario."""
 
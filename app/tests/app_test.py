@@ -1,8 +1,35 @@
 """Pytest"""
 
+import argparse
+import csv
+import io
+import asyncio
+import base64
+import json
+import logging
+import uuid
 import pytest
 import httpx
-from app.main import app
+from fastapi import HTTPException
+from sqlalchemy import event, func, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+from datetime import datetime, timedelta, timezone
+from app import database
+from app.admission import MemoryRateLimitStore, load_shedder, rate_limiter
+from app import archive, middleware, utils
+from app.archive import archive_completed, purge_refresh_tokens, purge_tombstones
+from app.cache import response_cache
+from app.ids import uuid7
+from app.changes import RESYNC, Subscriber, change_feed, event_stream
+from app.models.refresh_token import RefreshToken
+from app.models import TaskArchive, TaskCounter, TaskTombstone, User
+from app.models.task import Task
+from app.main import access_logger, app
+from app.pagination import decode_sync_token
+from app.schemas.task import TaskOut
+from app.utils import HashingPool, hash_password, hash_refresh_token
 
 
 @pytest.mark.asyncio
@@ -104,3 +131,892 @@ async def test_block_permission():
         # 5. Eliminar tarea
         response = await client.delete("/tasks/2")
         assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_task_pagination(client, auth_headers):
+    created = []
+    for i in range(5):
+        response = await client.post(
+            "/tasks/", json={"titulo": f"Tarea {i}"}, headers=auth_headers
+        )
+        created.append(response.json()["id"])
+
+    # Recorrer todas las páginas siguiendo el cursor
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = await client.get("/tasks/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(t["id"] for t in page)
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            break
+        params = {"limit": 2, "cursor": next_cursor}
+    assert seen == created
+
+    response = await client.get(
+        "/tasks/", params={"cursor": "no-es-un-cursor"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_task_list_matches_schema(client, auth_headers):
+    response = await client.post(
+        "/tasks/",
+        json={"titulo": "Tarea", "descripcion": 'Con ñ y "comillas"'},
+        headers=auth_headers,
+    )
+    created = response.json()
+
+    # La lista se codifica desde las filas sin validar con TaskOut
+    response = await client.get("/tasks/", headers=auth_headers)
+    expected = TaskOut.model_validate(created).model_dump_json().encode()
+    assert response.content == b"[" + expected + b"]"
+
+
+@pytest.mark.asyncio
+async def test_task_export(client, auth_headers):
+    for i in range(3):
+        await client.post(
+            "/tasks/", json={"titulo": f"Tarea {i}"}, headers=auth_headers
+        )
+
+    response = await client.get("/tasks/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["titulo"] for row in rows] == ["Tarea 0", "Tarea 1", "Tarea 2"]
+
+    response = await client.get(
+        "/tasks/export", params={"formato": "csv"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["titulo"] for row in rows] == ["Tarea 0", "Tarea 1", "Tarea 2"]
+
+
+@pytest.mark.asyncio
+async def test_task_batch(client, auth_headers):
+    response = await client.post(
+        "/tasks/batch",
+        json={"tareas": [{"titulo": f"Tarea {i}"} for i in range(3)]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    results = response.json()
+    assert [r["tarea"]["titulo"] for r in results] == ["Tarea 0", "Tarea 1", "Tarea 2"]
+    ids = [r["id"] for r in results]
+    missing = "00000000-0000-0000-0000-000000000000"
+
+    response = await client.patch(
+        "/tasks/batch",
+        json={
+            "tareas": [
+                {"id": ids[0], "estado": "completada"},
+                {"id": ids[1], "titulo": "Renombrada"},
+                {"id": missing, "titulo": "No existe"},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["ok"] for r in results] == [True, True, False]
+    assert results[0]["tarea"]["estado"] == "completada"
+    assert results[0]["tarea"]["titulo"] == "Tarea 0"
+    assert results[1]["tarea"]["titulo"] == "Renombrada"
+    assert results[2]["detail"] == "Tarea no encontrada"
+
+    response = await client.request(
+        "DELETE",
+        "/tasks/batch",
+        json={"ids": [ids[0], ids[2], missing]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert [r["ok"] for r in response.json()] == [True, True, False]
+
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert [t["id"] for t in response.json()] == [ids[1]]
+
+
+@pytest.mark.asyncio
+async def test_auth_cache(client, auth_headers, internal_headers):
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert response.status_code == 200
+    before = (await client.get("/internal/stats", headers=internal_headers)).json()[
+        "auth_cache"
+    ]
+
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert response.status_code == 200
+    after = (await client.get("/internal/stats", headers=internal_headers)).json()[
+        "auth_cache"
+    ]
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+
+    response = await client.get(
+        "/tasks/", headers={"Authorization": "Bearer token-invalido"}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_saturated():
+    pool = HashingPool(workers=1, max_pending=0)
+    with pytest.raises(HTTPException) as exc_info:
+        await pool.run(hash_password, "testpassword")
+    assert exc_info.value.status_code == 503
+    assert pool.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_access_log_route_template(client, auth_headers):
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    access_logger.addHandler(handler)
+    try:
+        await client.get(
+            "/tasks/00000000-0000-0000-0000-000000000000", headers=auth_headers
+        )
+    finally:
+        access_logger.removeHandler(handler)
+    entry = json.loads(records[-1].getMessage())
+    assert entry["method"] == "GET"
+    assert entry["route"] == "/tasks/{task_id}"
+    assert entry["status"] == 404
+    assert entry["duration_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_metrics(client, auth_headers, internal_headers):
+    await client.get(
+        "/tasks/00000000-0000-0000-0000-000000000000", headers=auth_headers
+    )
+    await client.get("/no-existe")
+
+    response = await client.get("/metrics", headers=internal_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert any(
+        line.startswith(
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/tasks/{task_id}",status="404"}'
+        )
+        for line in lines
+    )
+    assert any('route="unmatched"' in line for line in lines)
+    assert any(
+        line.startswith('db_statement_duration_seconds_count{operation="SELECT"}')
+        for line in lines
+    )
+    assert any(
+        line.startswith('password_hash_duration_seconds_count{operation="verify"}')
+        for line in lines
+    )
+    assert "# TYPE db_pool_checked_out gauge" in lines
+
+
+@pytest.mark.asyncio
+async def test_task_summary(client, auth_headers):
+    response = await client.get("/tasks/summary", headers=auth_headers)
+    assert response.json() == {
+        "total": 0,
+        "por_estado": {"pendiente": 0, "completada": 0},
+    }
+
+    response = await client.post(
+        "/tasks/batch",
+        json={"tareas": [{"titulo": f"Tarea {i}"} for i in range(4)]},
+        headers=auth_headers,
+    )
+    ids = [r["id"] for r in response.json()]
+    await client.patch(
+        "/tasks/batch",
+        json={"tareas": [{"id": i, "estado": "completada"} for i in ids[:2]]},
+        headers=auth_headers,
+    )
+    await client.put(f"/tasks/{ids[2]}", json={"titulo": "Otro"}, headers=auth_headers)
+    await client.delete(f"/tasks/{ids[0]}", headers=auth_headers)
+
+    response = await client.get("/tasks/summary", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 3,
+        "por_estado": {"pendiente": 2, "completada": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_task_search(client, auth_headers):
+    await client.post(
+        "/tasks/batch",
+        json={
+            "tareas": [
+                {"titulo": "Comprar leche", "descripcion": "Ir al supermercado"},
+                {"titulo": "Pagar facturas", "descripcion": "Luz y leche del mes"},
+                {"titulo": "Pasear al perro"},
+            ]
+        },
+        headers=auth_headers,
+    )
+
+    response = await client.get(
+        "/tasks/search", params={"q": "leche"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    titulos = [t["titulo"] for t in response.json()]
+    # La coincidencia en el título tiene más peso que en la descripción
+    assert titulos == ["Comprar leche", "Pagar facturas"]
+
+    response = await client.get(
+        "/tasks/search", params={"q": "leche", "limit": 1}, headers=auth_headers
+    )
+    assert len(response.json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_task_conditional_requests(client, auth_headers):
+    response = await client.post(
+        "/tasks/", json={"titulo": "Tarea"}, headers=auth_headers
+    )
+    task_id = response.json()["id"]
+    task_etag = response.headers["ETag"]
+
+    # Tarea sin cambios: 304 sin cuerpo
+    response = await client.get(
+        f"/tasks/{task_id}", headers={**auth_headers, "If-None-Match": task_etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await client.get("/tasks/", headers=auth_headers)
+    list_etag = response.headers["ETag"]
+    response = await client.get(
+        "/tasks/", headers={**auth_headers, "If-None-Match": list_etag}
+    )
+    assert response.status_code == 304
+
+    # Actualizar con la ETag vigente funciona y cambia ambas ETags
+    response = await client.put(
+        f"/tasks/{task_id}",
+        json={"titulo": "Nueva"},
+        headers={**auth_headers, "If-Match": task_etag},
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] != task_etag
+
+    response = await client.get(
+        "/tasks/", headers={**auth_headers, "If-None-Match": list_etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != list_etag
+
+    # Con la ETag vieja la actualización se rechaza
+    response = await client.put(
+        f"/tasks/{task_id}",
+        json={"titulo": "Perdida"},
+        headers={**auth_headers, "If-Match": task_etag},
+    )
+    assert response.status_code == 412
+
+    response = await client.put(
+        "/tasks/00000000-0000-0000-0000-000000000000",
+        json={"titulo": "No existe"},
+        headers={**auth_headers, "If-Match": task_etag},
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_replica_routing(client, auth_headers, monkeypatch):
+    # La "réplica" es un segundo engine contra la misma base de datos
+    replica = create_async_engine(database.DATABASE_URL)
+    replica_statements = []
+    event.listen(
+        replica.sync_engine,
+        "before_cursor_execute",
+        lambda *args: replica_statements.append(args[2]),
+    )
+    monkeypatch.setattr(database, "ReplicaSessionLocal", async_sessionmaker(replica))
+    monkeypatch.setattr(database.replica_router, "enabled", True)
+    try:
+        response = await client.get("/tasks/", headers=auth_headers)
+        assert response.status_code == 200
+        assert replica_statements
+
+        # Tras escribir, las lecturas del usuario van al primario
+        replica_statements.clear()
+        response = await client.post(
+            "/tasks/", json={"titulo": "Tarea"}, headers=auth_headers
+        )
+        response = await client.get("/tasks/", headers=auth_headers)
+        assert [t["titulo"] for t in response.json()] == ["Tarea"]
+        assert replica_statements == []
+    finally:
+        await replica.dispose()
+
+    # Si la réplica no acepta conexiones, se lee del primario
+    broken = create_async_engine("postgresql+asyncpg://nadie@127.0.0.1:1/nada")
+    monkeypatch.setattr(database, "ReplicaSessionLocal", async_sessionmaker(broken))
+    monkeypatch.setattr(database.replica_router, "_down_until", 0.0)
+    failures = database.replica_router.failures
+    async with database.read_session() as db:
+        assert (await db.execute(select(Task.id).limit(1))).all() is not None
+    assert database.replica_router.failures == failures + 1
+    async with database.read_session() as db:
+        await db.execute(select(Task.id).limit(1))
+    assert database.replica_router.failures == failures + 1
+    await broken.dispose()
+
+
+@pytest.mark.asyncio
+async def test_task_archive(client, auth_headers):
+    ids = []
+    for i in range(3):
+        response = await client.post(
+            "/tasks/", json={"titulo": f"Tarea {i}"}, headers=auth_headers
+        )
+        ids.append(response.json()["id"])
+    await client.patch(
+        "/tasks/batch",
+        json={"tareas": [{"id": i, "estado": "completada"} for i in ids[:2]]},
+        headers=auth_headers,
+    )
+
+    assert await archive_completed(timedelta(0), batch_size=1) >= 2
+
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert [t["id"] for t in response.json()] == ids[2:]
+    response = await client.get(
+        "/tasks/", params={"include_archived": True, "limit": 2}, headers=auth_headers
+    )
+    assert [t["id"] for t in response.json()] == ids[:2]
+    response = await client.get(
+        "/tasks/",
+        params={"include_archived": True, "cursor": response.headers["X-Next-Cursor"]},
+        headers=auth_headers,
+    )
+    assert [t["id"] for t in response.json()] == ids[2:]
+
+    response = await client.get(f"/tasks/{ids[0]}", headers=auth_headers)
+    assert response.status_code == 404
+    response = await client.get(
+        f"/tasks/{ids[0]}", params={"include_archived": True}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["estado"] == "completada"
+
+    response = await client.get(
+        "/tasks/export", params={"include_archived": True}, headers=auth_headers
+    )
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ids
+
+    # El resumen sigue contando las tareas archivadas
+    response = await client.get("/tasks/summary", headers=auth_headers)
+    assert response.json()["por_estado"] == {"pendiente": 1, "completada": 2}
+
+
+@pytest.mark.asyncio
+async def test_task_archive_lock_timeout(client, auth_headers, monkeypatch, caplog):
+    monkeypatch.setattr(archive, "ARCHIVE_LOCK_TIMEOUT_MS", 100)
+    monkeypatch.setattr(archive, "ARCHIVE_RETRY_SECONDS", 0)
+    response = await client.post(
+        "/tasks/",
+        json={"titulo": "Completada", "estado": "completada"},
+        headers=auth_headers,
+    )
+    task = response.json()
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.id_usuario == task["id_usuario"])
+            .values(expires_at=func.now() - timedelta(days=1))
+        )
+        await db.commit()
+
+    # Con el usuario bloqueado, la comprobación de la clave foránea del
+    # INSERT en tasks_archive agota el lock_timeout
+    async with database.engine.connect() as other:
+        await other.execute(
+            text("SELECT 1 FROM users WHERE id = :id FOR UPDATE"),
+            {"id": task["id_usuario"]},
+        )
+        with caplog.at_level(logging.WARNING, logger="app.archive"):
+            args = argparse.Namespace(
+                older_than_days=0, batch_size=1000, pause=0, tombstone_days=30
+            )
+            with pytest.raises(DBAPIError):
+                await archive.run(args)
+        await other.rollback()
+    messages = [record.getMessage() for record in caplog.records]
+    assert sum("se reintenta" in m for m in messages) == archive.ARCHIVE_MAX_RETRIES
+    assert any("Archivado detenido" in m for m in messages)
+
+    # Las purgas se ejecutan aunque el archivado falle
+    async with database.AsyncSessionLocal() as db:
+        tokens = await db.scalar(
+            select(func.count())
+            .select_from(RefreshToken)
+            .where(RefreshToken.id_usuario == task["id_usuario"])
+        )
+    assert tokens == 0
+
+    # Los errores que no son de bloqueo no se reintentan
+    caplog.clear()
+    monkeypatch.setattr(archive, "ARCHIVE_LOCK_TIMEOUT_MS", -1)
+    with caplog.at_level(logging.WARNING, logger="app.archive"):
+        with pytest.raises(DBAPIError):
+            await archive_completed(timedelta(0))
+    assert not caplog.records
+    monkeypatch.setattr(archive, "ARCHIVE_LOCK_TIMEOUT_MS", 100)
+
+    response = await client.get(f"/tasks/{task['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert await archive_completed(timedelta(0)) >= 1
+
+
+@pytest.mark.asyncio
+async def test_task_changes(client, auth_headers, monkeypatch):
+    response = await client.post(
+        "/tasks/", json={"titulo": "Tarea"}, headers=auth_headers
+    )
+    task = response.json()
+    # Sin since no hay flujo: el SSE tiene su propia ruta
+    response = await client.get("/tasks/changes", headers=auth_headers)
+    assert response.status_code == 422
+    stream = event_stream(task["id_usuario"])
+    try:
+        assert await anext(stream) == "retry: 3000\n\n"
+        await change_feed.wait_connected(5)
+        await client.put(
+            f"/tasks/{task['id']}", json={"estado": "completada"}, headers=auth_headers
+        )
+        await client.delete(f"/tasks/{task['id']}", headers=auth_headers)
+        events = [await asyncio.wait_for(anext(stream), 5) for _ in range(2)]
+        assert events[0].startswith("event: update\n")
+        update = json.loads(events[0].split("data: ")[1])
+        assert update["id"] == task["id"]
+        assert update["version"] == 2 and update["estado"] == "completada"
+        assert events[1].startswith("event: delete\n")
+
+        # Límite de suscripciones por usuario
+        monkeypatch.setattr(change_feed, "max_per_user", 1)
+        response = await client.get("/tasks/changes/stream", headers=auth_headers)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+    finally:
+        await stream.aclose()
+        await change_feed.close()
+    assert change_feed.stats()["subscribers"] == 0
+
+    # Un cliente lento recibe un único resync en lugar de acumular eventos
+    subscriber = Subscriber(task["id_usuario"], 1)
+    assert subscriber.push({"op": "insert"})
+    assert not subscriber.push({"op": "update"})
+    assert subscriber.queue.get_nowait() == RESYNC
+    assert subscriber.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_task_delta_sync(client, auth_headers):
+    ids = []
+    for i in range(3):
+        response = await client.post(
+            "/tasks/", json={"titulo": f"Tarea {i}"}, headers=auth_headers
+        )
+        ids.append(response.json()["id"])
+
+    # Sincronización completa, en dos páginas
+    response = await client.get(
+        "/tasks/changes", params={"since": "0", "limit": 2}, headers=auth_headers
+    )
+    body = response.json()
+    assert [t["id"] for t in body["tareas"]] == ids[:2]
+    assert body["hay_mas"] is True
+    response = await client.get(
+        "/tasks/changes",
+        params={"since": body["token"], "limit": 2},
+        headers=auth_headers,
+    )
+    body = response.json()
+    assert [t["id"] for t in body["tareas"]] == ids[2:]
+    assert body["eliminadas"] == [] and body["hay_mas"] is False
+    token = body["token"]
+
+    response = await client.get(
+        "/tasks/changes", params={"since": token}, headers=auth_headers
+    )
+    assert response.json()["tareas"] == []
+
+    await client.put(
+        f"/tasks/{ids[0]}", json={"estado": "completada"}, headers=auth_headers
+    )
+    await client.delete(f"/tasks/{ids[1]}", headers=auth_headers)
+    response = await client.post(
+        "/tasks/", json={"titulo": "Nueva"}, headers=auth_headers
+    )
+    nueva = response.json()["id"]
+    response = await client.get(
+        "/tasks/changes", params={"since": token}, headers=auth_headers
+    )
+    body = response.json()
+    assert [t["id"] for t in body["tareas"]] == [ids[0], nueva]
+    assert body["tareas"][0]["estado"] == "completada"
+    assert body["eliminadas"] == [ids[1]]
+
+    # Las tareas archivadas también llegan como eliminadas
+    await archive_completed(timedelta(0))
+    response = await client.get(
+        "/tasks/changes", params={"since": body["token"]}, headers=auth_headers
+    )
+    assert response.json()["eliminadas"] == [ids[0]]
+    assert await purge_tombstones(timedelta(days=1)) == 0
+
+    response = await client.get(
+        "/tasks/changes", params={"since": "no-es-un-token"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+    change_seq, task_id, _ = decode_sync_token(token)
+    expired = datetime.now(timezone.utc) - timedelta(days=365)
+    stale = base64.urlsafe_b64encode(
+        f"{change_seq}|{task_id}|{expired.isoformat()}".encode()
+    ).decode()
+    response = await client.get(
+        "/tasks/changes", params={"since": stale}, headers=auth_headers
+    )
+    assert response.status_code == 410
+
+
+@pytest.mark.asyncio
+async def test_index_audit(client, auth_headers):
+    async with database.engine.connect() as conn:
+        # Índices que repiten las columnas de la clave primaria
+        duplicates = await conn.scalars(text("""
+            SELECT i.indexrelid::regclass::text FROM pg_index i
+            JOIN pg_index pk ON pk.indrelid = i.indrelid AND pk.indisprimary
+            WHERE NOT i.indisprimary AND i.indkey::text = pk.indkey::text
+        """))
+        assert duplicates.all() == []
+        # Claves foráneas sin un índice que empiece por sus columnas
+        unindexed = await conn.scalars(text("""
+            SELECT c.conname FROM pg_constraint c
+            WHERE c.contype = 'f' AND NOT EXISTS (
+                SELECT 1 FROM pg_index i WHERE i.indrelid = c.conrelid
+                AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] = c.conkey
+            )
+        """))
+        assert unindexed.all() == []
+
+    ids = [uuid7() for _ in range(1000)]
+    assert all(i.version == 7 and i.variant == uuid.RFC_4122 for i in ids)
+    # Monótonos aunque compartan milisegundo
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    response = await client.post(
+        "/tasks/", json={"titulo": "Tarea"}, headers=auth_headers
+    )
+    assert uuid.UUID(response.json()["id"]).version == 7
+
+
+@pytest.mark.asyncio
+async def test_task_list_filters(client, auth_headers, query_counter, monkeypatch):
+    monkeypatch.setattr(response_cache, "ttl", 0)
+    ids = []
+    for titulo, estado in [
+        ("Comprar leche", "pendiente"),
+        ("Comprar pan", "completada"),
+        ("Llamar 50%", "pendiente"),
+    ]:
+        response = await client.post(
+            "/tasks/", json={"titulo": titulo, "estado": estado}, headers=auth_headers
+        )
+        ids.append(response.json()["id"])
+    await client.put(
+        f"/tasks/{ids[0]}",
+        json={"titulo": "Comprar leche entera"},
+        headers=auth_headers,
+    )
+
+    async def listed(**params):
+        response = await client.get("/tasks/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        return [t["id"] for t in response.json()]
+
+    with query_counter() as queries:
+        assert await listed(estado="pendiente") == [ids[0], ids[2]]
+    # Constante en el SQL para que los planes genéricos usen el índice parcial
+    assert "'pendiente'" in queries[-1]
+    assert await listed(prefijo="comprar") == ids[:2]
+    assert await listed(prefijo="Llamar 50%") == [ids[2]]
+    assert await listed(prefijo="Llamar 5%") == []
+    assert await listed(sort="-fecha_creacion") == ids[::-1]
+    assert await listed(sort="-updated_at", limit=1) == [ids[0]]
+
+    response = await client.get(
+        "/tasks/", params={"sort": "-updated_at", "limit": 2}, headers=auth_headers
+    )
+    response = await client.get(
+        "/tasks/",
+        params={"sort": "-updated_at", "cursor": response.headers["X-Next-Cursor"]},
+        headers=auth_headers,
+    )
+    assert [t["id"] for t in response.json()] == [ids[1]]
+
+    response = await client.get(f"/tasks/{ids[1]}", headers=auth_headers)
+    desde = response.json()["fecha_creacion"]
+    assert await listed(creada_desde=desde) == ids[1:]
+    assert await listed(creada_hasta=desde) == ids[:1]
+
+    for params in (
+        {"sort": "titulo"},
+        {"estado": "archivada"},
+        {"creada_desde": "2026-01-01T00:00:00"},
+        {"creada_desde": desde, "creada_hasta": desde},
+    ):
+        response = await client.get("/tasks/", params=params, headers=auth_headers)
+        assert response.status_code in (400, 422), params
+
+
+@pytest.mark.asyncio
+async def test_rate_limits(client, auth_headers, monkeypatch, internal_headers):
+    store = MemoryRateLimitStore(10)
+    assert await store.acquire("k", 1, 2) == 0
+    assert await store.acquire("k", 1, 2) == 0
+    assert 0.9 < await store.acquire("k", 1, 2) <= 1
+
+    monkeypatch.setattr(rate_limiter, "store", MemoryRateLimitStore(10))
+    monkeypatch.setattr(rate_limiter, "user_rate", 0.1)
+    monkeypatch.setattr(rate_limiter, "user_burst", 2)
+    # Con el token ya en la caché de autenticación no se decodifica el JWT
+    decoded = []
+
+    def counting_decode(token):
+        decoded.append(token)
+        return utils.decode_access_token(token)
+
+    monkeypatch.setattr(middleware, "decode_access_token", counting_decode)
+    for _ in range(2):
+        response = await client.get("/tasks/", headers=auth_headers)
+        assert response.status_code == 200
+    assert len(decoded) == 1
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    # Las peticiones anónimas solo cuentan contra su IP
+    response = await client.get("/tasks/summary")
+    assert response.status_code == 401
+
+    monkeypatch.setattr(rate_limiter, "ip_rate", 0.1)
+    monkeypatch.setattr(rate_limiter, "ip_burst", 1)
+    response = await client.get("/tasks/summary")
+    assert response.status_code == 401
+    response = await client.get("/tasks/summary")
+    assert response.status_code == 429
+    response = await client.get("/metrics", headers=internal_headers)
+    assert response.status_code == 200
+    assert 'http_requests_rejected_total{reason="ip"}' in response.text
+
+
+@pytest.mark.asyncio
+async def test_load_shedding(client, auth_headers, monkeypatch, internal_headers):
+    monkeypatch.setattr(database.pool_wait_stats, "wait_recent", 1.0)
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert response.status_code == 200
+
+    # Con peticiones esperando conexión y una espera reciente alta, se rechaza
+    monkeypatch.setattr(database.pool_wait_stats, "waiting", 1)
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    response = await client.get("/internal/stats", headers=internal_headers)
+    assert response.status_code == 200
+    monkeypatch.setattr(database.pool_wait_stats, "waiting", 0)
+
+    monkeypatch.setattr(load_shedder, "max_in_flight", 1)
+    monkeypatch.setattr(load_shedder, "in_flight", 1)
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert response.status_code == 503
+    monkeypatch.setattr(load_shedder, "in_flight", 0)
+    response = await client.get("/tasks/", headers=auth_headers)
+    assert response.status_code == 200
+    assert load_shedder.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_tokens(client, internal_headers):
+    email = f"user-{uuid.uuid4().hex}@example.com"
+    await client.post("/users/", json={"email": email, "password": "testpassword"})
+    response = await client.post(
+        "/users/login/", data={"username": email, "password": "testpassword"}
+    )
+    assert response.status_code == 200
+    login = response.json()
+    assert login["token_type"] == "bearer" and login["expires_in"] > 0
+
+    response = await client.post(
+        "/users/refresh/", json={"refresh_token": login["refresh_token"]}
+    )
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != login["refresh_token"]
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    response = await client.get("/tasks/", headers=headers)
+    assert response.status_code == 200
+
+    # Reutilizar un token ya usado revoca también el emitido al usarlo
+    response = await client.post(
+        "/users/refresh/", json={"refresh_token": login["refresh_token"]}
+    )
+    assert response.status_code == 401
+    response = await client.post(
+        "/users/refresh/", json={"refresh_token": rotated["refresh_token"]}
+    )
+    assert response.status_code == 401
+    response = await client.post("/users/refresh/", json={"refresh_token": "x"})
+    assert response.status_code == 401
+    metrics = (await client.get("/metrics", headers=internal_headers)).text
+    assert 'auth_token_refreshes_total{result="reuse"}' in metrics
+
+    # El logout revoca solo la familia de su login
+    tokens = []
+    for _ in range(2):
+        response = await client.post(
+            "/users/login/", data={"username": email, "password": "testpassword"}
+        )
+        tokens.append(response.json()["refresh_token"])
+    response = await client.post("/users/logout/", json={"refresh_token": tokens[0]})
+    assert response.status_code == 204
+    response = await client.post("/users/refresh/", json={"refresh_token": tokens[0]})
+    assert response.status_code == 401
+    response = await client.post("/users/refresh/", json={"refresh_token": tokens[1]})
+    assert response.status_code == 200
+    refresh_token = response.json()["refresh_token"]
+
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+            .values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+        )
+        await db.commit()
+    response = await client.post(
+        "/users/refresh/", json={"refresh_token": refresh_token}
+    )
+    assert response.status_code == 401
+    assert await purge_refresh_tokens() >= 1
+    async with database.AsyncSessionLocal() as db:
+        assert (
+            await db.scalar(
+                select(RefreshToken).where(
+                    RefreshToken.token_hash == hash_refresh_token(refresh_token)
+                )
+            )
+            is None
+        )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_lock_order(client, auth_headers):
+    ids = []
+    for titulo in ("Borrar", "Actualizar"):
+        response = await client.post(
+            "/tasks/", json={"titulo": titulo}, headers=auth_headers
+        )
+        ids.append(response.json()["id"])
+
+    # Otra transacción del usuario tiene su lock, una tarea y sus contadores
+    async with database.engine.connect() as other:
+        await other.execute(
+            text("UPDATE tasks SET estado = 'completada' WHERE id = :id"),
+            {"id": ids[1]},
+        )
+        delete = asyncio.create_task(
+            client.delete(f"/tasks/{ids[0]}", headers=auth_headers)
+        )
+        await asyncio.sleep(0.3)
+        assert not delete.done()
+        # El DELETE espera al lock del usuario sin haber bloqueado su fila
+        await other.execute(
+            text("UPDATE tasks SET titulo = 'Otra' WHERE id = :id"), {"id": ids[0]}
+        )
+        await other.commit()
+    response = await delete
+    assert response.status_code == 204
+
+    # Escrituras simultáneas del mismo usuario, sueltas y por lotes
+    response = await client.post(
+        "/tasks/batch",
+        json={"tareas": [{"titulo": f"Lote {i}"} for i in range(6)]},
+        headers=auth_headers,
+    )
+    batch = [item["id"] for item in response.json()]
+    responses = await asyncio.gather(
+        client.patch(
+            "/tasks/batch",
+            json={"tareas": [{"id": i, "estado": "completada"} for i in batch]},
+            headers=auth_headers,
+        ),
+        *(client.delete(f"/tasks/{i}", headers=auth_headers) for i in batch[::2]),
+        *(
+            client.put(f"/tasks/{i}", json={"titulo": "Editada"}, headers=auth_headers)
+            for i in batch[1::2]
+        ),
+        client.request(
+            "DELETE", "/tasks/batch", json={"ids": batch[3:]}, headers=auth_headers
+        ),
+    )
+    assert all(r.status_code < 400 or r.status_code == 404 for r in responses)
+    summary = (await client.get("/tasks/summary", headers=auth_headers)).json()
+    remaining = (await client.get("/tasks/", headers=auth_headers)).json()
+    assert summary["total"] == len(remaining)
+
+
+@pytest.mark.asyncio
+async def test_delete_user_with_tasks(client, auth_headers):
+    response = await client.post(
+        "/tasks/batch",
+        json={"tareas": [{"titulo": "Una"}, {"titulo": "Otra"}]},
+        headers=auth_headers,
+    )
+    task = response.json()[0]["tarea"]
+    await client.put(
+        f"/tasks/{task['id']}", json={"estado": "completada"}, headers=auth_headers
+    )
+    assert await archive_completed(timedelta(0)) >= 1
+
+    async with database.AsyncSessionLocal() as db:
+        user = await db.get(User, task["id_usuario"])
+        await db.delete(user)
+        await db.commit()
+        for model in (Task, TaskArchive, TaskTombstone, TaskCounter):
+            rows = await db.scalars(
+                select(model).where(model.id_usuario == task["id_usuario"])
+            )
+            assert rows.all() == []
+
+
+@pytest.mark.asyncio
+async def test_internal_routes_require_token(client, auth_headers, monkeypatch):
+    for path in ("/metrics", "/internal/stats"):
+        response = await client.get(path)
+        assert response.status_code == 404
+        response = await client.get(path, headers=auth_headers)
+        assert response.status_code == 404
+    assert "/metrics" not in (await client.get("/openapi.json")).text
+
+    monkeypatch.setattr(utils, "INTERNAL_API_TOKEN", "token-interno")
+    for path in ("/metrics", "/internal/stats"):
+        response = await client.get(path, headers=auth_headers)
+        assert response.status_code == 401
+        response = await client.get(
+            path, headers={"Authorization": "Bearer token-interno"}
+        )
+        assert response.status_code == 200
@@ -0,0 +1,95 @@
+"""Importación y exportación masiva"""
+
+import csv
+import io
+import json
+import uuid
+import pytest
+from app import database
+from app.cli import import_tasks, export_tasks, export_users, user_id_by_email
+from app.models import Task, User
+from app.schemas.task import ExportFormat
+
+
+async def _register(client) -> tuple[str, dict]:
+    email = f"user-{uuid.uuid4().hex}@example.com"
+    await client.post("/users/", json={"email": email, "password": "testpassword"})
+    response = await client.post(
+        "/users/login/", data={"username": email, "password": "testpassword"}
+    )
+    return email, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_import_export_tasks(client):
+    email, headers = await _register(client)
+    source = io.StringIO(
+        "email,titulo,descripcion,estado\r\n"
+        f"{email},Primera,,\r\n"
+        f'{email},"Con, coma","Dos\nlíneas",completada\r\n'
+        f"{email},{'x' * 256},,\r\n"
+        f"{email},Estado raro,,archivada\r\n"
+        ",Sin usuario,,\r\n"
+        "nadie@example.com,Usuario desconocido,,\r\n"
+        f"{email},Última,,pendiente\r\n"
+    )
+    report = await import_tasks(source, ExportFormat.CSV, chunk_size=2)
+    assert report.imported == 3
+    assert [number for number, _ in report.errors] == [5, 6, 7, 8]
+    assert report.errors[0][1].startswith("titulo:")
+    assert "nadie@example.com" in report.errors[3][1]
+
+    response = await client.get("/tasks/", headers=headers)
+    tareas = response.json()
+    assert [t["titulo"] for t in tareas] == ["Primera", "Con, coma", "Última"]
+    assert tareas[1]["descripcion"] == "Dos\nlíneas"
+    assert tareas[1]["estado"] == "completada"
+    summary = (await client.get("/tasks/summary", headers=headers)).json()
+    assert summary["total"] == 3
+
+    source = io.StringIO(
+        json.dumps({"email": email, "titulo": 'Comillas "y" \\barras'})
+        + "\n\n{roto\n[]\n"
+    )
+    report = await import_tasks(source, ExportFormat.NDJSON)
+    assert report.imported == 1
+    assert [number for number, _ in report.errors] == [3, 4]
+
+    output = io.BytesIO()
+    await export_tasks(output, ExportFormat.NDJSON, await user_id_by_email(email))
+    rows = [json.loads(line) for line in output.getvalue().decode().splitlines()]
+    assert [row["titulo"] for row in rows][-1] == 'Comillas "y" \\barras'
+    assert {row["email"] for row in rows} == {email}
+
+    # La exportación en CSV se puede volver a importar tal cual
+    output = io.BytesIO()
+    await export_tasks(output, ExportFormat.CSV, await user_id_by_email(email))
+    exported = output.getvalue().decode()
+    assert len(list(csv.DictReader(io.StringIO(exported)))) == 4
+    report = await import_tasks(io.StringIO(exported, newline=""), ExportFormat.CSV)
+    assert report == (4, [])
+
+    output = io.BytesIO()
+    await export_users(output, ExportFormat.CSV)
+    users = list(csv.DictReader(io.StringIO(output.getvalue().decode())))
+    assert email in {user["email"] for user in users}
+    assert "password_hash" not in users[0]
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_email_filter():
+    email = f"barra\\{uuid.uuid4().hex}@example.com"
+    async with database.AsyncSessionLocal() as db:
+        user = User(email=email, password_hash="x")
+        db.add(user)
+        await db.flush()
+        db.add(Task(titulo="Con barra", id_usuario=user.id))
+        await db.commit()
+
+    output = io.BytesIO()
+    await export_tasks(output, ExportFormat.NDJSON, await user_id_by_email(email))
+    rows = [json.loads(line) for line in output.getvalue().decode().splitlines()]
+    assert [(row["email"], row["titulo"]) for row in rows] == [(email, "Con barra")]
+
+    with pytest.raises(LookupError):
+        await user_id_by_email("nadie@example.com")
@@ -0,0 +1,104 @@
+"""Fixtures compartidas de los tests"""
+
+import time
+import uuid
+from contextlib import contextmanager
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import utils
+from app.admission import rate_limiter
+from app.database import engine
+from app.main import app
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def dispose_engine():
+    """Cierra las conexiones del pool al terminar cada test.
+
+    Cada test corre en su propio event loop y las conexiones de asyncpg no
+    pueden reutilizarse desde otro loop.
+    """
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(monkeypatch):
+    """Sin límites de peticiones: todos los tests comparten la IP del cliente"""
+    monkeypatch.setattr(rate_limiter, "ip_rate", 0)
+    monkeypatch.setattr(rate_limiter, "user_rate", 0)
+
+
+@pytest.fixture
+def internal_headers(monkeypatch):
+    """Activa /metrics e /internal/ y devuelve los encabezados para llamarlas"""
+    monkeypatch.setattr(utils, "INTERNAL_API_TOKEN", "token-interno")
+    return {"Authorization": "Bearer token-interno"}
+
+
+@pytest_asyncio.fixture
+async def client():
+    """Cliente HTTP contra la aplicación ASGI"""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+async def auth_headers(client):
+    """Registra un usuario nuevo y devuelve los encabezados con su token"""
+    email = f"user-{uuid.uuid4().hex}@example.com"
+    response = await client.post(
+        "/users/", json={"email": email, "password": "testpassword"}
+    )
+    assert response.status_code == 200
+    response = await client.post(
+        "/users/login/", data={"username": email, "password": "testpassword"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class QueryLog(list):
+    """Sentencias SQL ejecutadas y tiempo total en la base de datos, en segundos"""
+
+    duration = 0.0
+
+    def __str__(self) -> str:
+        return f"{len(self)} sentencias, {self.duration * 1000:.1f} ms:\n" + "\n".join(
+            f"  {statement}" for statement in self
+        )
+
+
+@pytest.fixture
+def query_counter():
+    """Devuelve un context manager que registra las sentencias SQL ejecutadas
+
+    Escucha en ``Engine`` para contar también las del motor de la réplica.
+    """
+
+    @contextmanager
+    def count():
+        statements = QueryLog()
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+            conn.info.setdefault("query_log_start", []).append(time.perf_counter())
+
+        def after_cursor_execute(conn, *args):
+            statements.duration += (
+                time.perf_counter() - conn.info["query_log_start"].pop()
+            )
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", after_cursor_execute)
+
+    return count
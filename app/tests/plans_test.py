@@ -0,0 +1,59 @@
+"""Índices que usan las consultas de la lista de tareas"""
+
+import json
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import text
+from app.database import engine
+from app.routers.task import tasks_query
+from app.schemas.task import TaskFilters, TaskSort, TaskStatus
+
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+async def _explain(query) -> list[dict]:
+    """Nodos del plan de ``query``.
+
+    Las tablas de los tests son pequeñas y el planificador preferiría
+    recorrerlas enteras, así que se desactivan los recorridos secuenciales.
+    """
+    sql = query.compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+    async with engine.begin() as conn:
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(_nodes(plan[0]["Plan"]))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filters, index",
+    [
+        (TaskFilters(), "ix_tasks_usuario_fecha_id"),
+        (
+            TaskFilters(estado=TaskStatus.PENDIENTE),
+            "ix_tasks_pendientes_usuario_fecha_id",
+        ),
+        (
+            TaskFilters(estado=TaskStatus.PENDIENTE, sort=TaskSort.FECHA_CREACION_DESC),
+            "ix_tasks_pendientes_usuario_fecha_id",
+        ),
+        (
+            TaskFilters(creada_desde=datetime(2026, 1, 1, tzinfo=timezone.utc)),
+            "ix_tasks_usuario_fecha_id",
+        ),
+        (TaskFilters(prefijo="Com"), "ix_tasks_usuario_fecha_id"),
+        (TaskFilters(sort=TaskSort.UPDATED_AT_DESC), "ix_tasks_usuario_updated_id"),
+    ],
+)
+async def test_task_list_uses_index(filters, index):
+    nodes = await _explain(tasks_query(1, False, limit=101, filters=filters))
+    assert index in {node.get("Index Name") for node in nodes}
+    # El índice ya devuelve las filas en el orden pedido
+    assert "Sort" not in {node["Node Type"] for node in nodes}
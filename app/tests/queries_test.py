@@ -0,0 +1,223 @@
+"""Número de sentencias SQL por endpoint"""
+
+import uuid
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy.exc import InvalidRequestError
+from app import database
+from app.cache import response_cache
+from app.main import app
+from app.models.task import Task
+from app.models.user import User
+from app.routers import task as task_router
+
+MISSING = "00000000-0000-0000-0000-000000000000"
+
+# Sentencias SQL máximas por ruta, con la autenticación ya en caché y sin la
+# caché de respuestas. Cada ruta nueva de tareas o usuarios debe añadirse aquí.
+BUDGETS = {
+    ("POST", "/users/"): 2,
+    ("POST", "/users/login/"): 2,
+    ("POST", "/users/refresh/"): 2,
+    ("POST", "/users/logout/"): 1,
+    ("POST", "/tasks/"): 1,
+    ("POST", "/tasks/batch"): 1,
+    ("PATCH", "/tasks/batch"): 1,
+    ("DELETE", "/tasks/batch"): 1,
+    ("GET", "/tasks/"): 2,
+    ("GET", "/tasks/export"): 1,
+    ("GET", "/tasks/search"): 1,
+    ("GET", "/tasks/summary"): 1,
+    ("GET", "/tasks/changes"): 1,
+    ("GET", "/tasks/changes/stream"): 0,
+    ("GET", "/tasks/{task_id}"): 1,
+    ("PUT", "/tasks/{task_id}"): 1,
+    ("DELETE", "/tasks/{task_id}"): 1,
+}
+
+
+async def finite_stream(user_id):
+    yield "retry: 3000\n\n"
+
+
+async def _warm_up(client, headers):
+    """Primera petición autenticada: deja el token en la caché de autenticación"""
+    response = await client.get("/tasks/", params={"limit": 1}, headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_task_writes_single_statement(client, auth_headers, query_counter):
+    await _warm_up(client, auth_headers)
+
+    with query_counter() as queries:
+        response = await client.post(
+            "/tasks/", json={"titulo": "Tarea"}, headers=auth_headers
+        )
+    assert response.status_code == 201
+    assert len(queries) == 1
+    task_id = response.json()["id"]
+
+    with query_counter() as queries:
+        response = await client.put(
+            f"/tasks/{task_id}", json={"estado": "completada"}, headers=auth_headers
+        )
+    assert response.status_code == 200
+    assert response.json()["estado"] == "completada"
+    assert len(queries) == 1
+
+    with query_counter() as queries:
+        response = await client.delete(f"/tasks/{task_id}", headers=auth_headers)
+    assert response.status_code == 204
+    assert len(queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_task_writes_missing_single_statement(
+    client, auth_headers, query_counter
+):
+    await _warm_up(client, auth_headers)
+
+    with query_counter() as queries:
+        response = await client.put(
+            f"/tasks/{MISSING}", json={"titulo": "No existe"}, headers=auth_headers
+        )
+    assert response.status_code == 404
+    assert len(queries) == 1
+
+    with query_counter() as queries:
+        response = await client.delete(f"/tasks/{MISSING}", headers=auth_headers)
+    assert response.status_code == 404
+    assert len(queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_unchanged_poll_single_statement(
+    client, auth_headers, query_counter, monkeypatch
+):
+    monkeypatch.setattr(response_cache, "ttl", 0)
+    await _warm_up(client, auth_headers)
+    response = await client.get("/tasks/", headers=auth_headers)
+    etag = response.headers["ETag"]
+
+    with query_counter() as queries:
+        response = await client.get(
+            "/tasks/", headers={**auth_headers, "If-None-Match": etag}
+        )
+    assert response.status_code == 304
+    assert len(queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_reads_skip_database(client, auth_headers, query_counter):
+    await _warm_up(client, auth_headers)
+    response = await client.post(
+        "/tasks/", json={"titulo": "Cacheada"}, headers=auth_headers
+    )
+    task_id = response.json()["id"]
+    await client.get("/tasks/", headers=auth_headers)
+    await client.get(f"/tasks/{task_id}", headers=auth_headers)
+
+    with query_counter() as queries:
+        listed = await client.get("/tasks/", headers=auth_headers)
+        single = await client.get(f"/tasks/{task_id}", headers=auth_headers)
+    assert listed.status_code == 200 and single.status_code == 200
+    assert [t["titulo"] for t in listed.json()] == ["Cacheada"]
+    assert single.json()["titulo"] == "Cacheada"
+    assert len(queries) == 0
+
+    # Una escritura invalida las respuestas cacheadas del usuario
+    await client.put(
+        f"/tasks/{task_id}", json={"titulo": "Editada"}, headers=auth_headers
+    )
+    listed = await client.get("/tasks/", headers=auth_headers)
+    single = await client.get(f"/tasks/{task_id}", headers=auth_headers)
+    assert [t["titulo"] for t in listed.json()] == ["Editada"]
+    assert single.json()["titulo"] == "Editada"
+
+
+def test_every_route_has_budget():
+    routes = {
+        (method, route.path)
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith(("/users", "/tasks"))
+        for method in route.methods
+    }
+    assert routes == set(BUDGETS)
+
+
+@pytest.mark.asyncio
+async def test_query_budgets(client, query_counter, monkeypatch):
+    monkeypatch.setattr(response_cache, "ttl", 0)
+    used = {}
+
+    async def call(method, template, path=None, **kwargs):
+        with query_counter() as queries:
+            response = await client.request(method, path or template, **kwargs)
+        assert response.status_code < 400, response.text
+        used[(method, template)] = queries
+        return response
+
+    email = f"user-{uuid.uuid4().hex}@example.com"
+    credentials = {"username": email, "password": "testpassword"}
+    await call("POST", "/users/", json={"email": email, "password": "testpassword"})
+    tokens = (await call("POST", "/users/login/", data=credentials)).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    await _warm_up(client, headers)
+
+    response = await call("POST", "/tasks/", json={"titulo": "Tarea"}, headers=headers)
+    task_id = response.json()["id"]
+    path = f"/tasks/{task_id}"
+    batch = [{"titulo": f"Lote {i}"} for i in range(20)]
+    response = await call(
+        "POST", "/tasks/batch", json={"tareas": batch}, headers=headers
+    )
+    ids = [item["id"] for item in response.json()]
+    await call(
+        "PATCH",
+        "/tasks/batch",
+        json={"tareas": [{"id": i, "estado": "completada"} for i in ids]},
+        headers=headers,
+    )
+    await call("GET", "/tasks/", headers=headers)
+    await call("GET", "/tasks/export", headers=headers)
+    await call("GET", "/tasks/search", params={"q": "lote"}, headers=headers)
+    await call("GET", "/tasks/summary", headers=headers)
+    await call("GET", "/tasks/changes", params={"since": "0"}, headers=headers)
+    # Un flujo que termina tras el primer evento: solo cuenta la autenticación
+    monkeypatch.setattr(task_router, "event_stream", finite_stream)
+    await call("GET", "/tasks/changes/stream", headers=headers)
+    await call("GET", "/tasks/{task_id}", path, headers=headers)
+    await call("PUT", "/tasks/{task_id}", path, json={"titulo": "B"}, headers=headers)
+    await call("DELETE", "/tasks/batch", json={"ids": ids}, headers=headers)
+    await call("DELETE", "/tasks/{task_id}", path, headers=headers)
+    response = await call(
+        "POST", "/users/refresh/", json={"refresh_token": tokens["refresh_token"]}
+    )
+    await call(
+        "POST",
+        "/users/logout/",
+        json={"refresh_token": response.json()["refresh_token"]},
+    )
+
+    over = [
+        f"{method} {route} (máximo {BUDGETS[method, route]}): {queries}"
+        for (method, route), queries in used.items()
+        if len(queries) > BUDGETS[method, route]
+    ]
+    assert not over, "\n".join(over)
+    assert set(used) == set(BUDGETS)
+
+
+@pytest.mark.asyncio
+async def test_lazy_loads_raise(client, auth_headers):
+    response = await client.post(
+        "/tasks/", json={"titulo": "Tarea"}, headers=auth_headers
+    )
+    async with database.AsyncSessionLocal() as db:
+        task = await db.get(Task, uuid.UUID(response.json()["id"]))
+        with pytest.raises(InvalidRequestError):
+            task.owner
+        user = await db.get(User, task.id_usuario)
+        with pytest.raises(InvalidRequestError):
+            user.tasks
@@ -1,15 +1,22 @@
+import asyncio
+import hashlib
 import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, NamedTuple, Optional, TypeVar
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event
 from sqlalchemy.future import select
 from dotenv import load_dotenv
+from app.cache import TTLCache
+from app.metrics import PASSWORD_HASH_DURATION, CallbackMetric, registry
 from app.models.user import User
-from app.database import async_session
+from app.database import read_session
 
 
 load_dotenv()
@@ -17,6 +24,21 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+# Si se confía en los claims firmados no se consulta la tabla de usuarios
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "64"))
+# Token de /metrics e /internal/; sin él esas rutas responden 404
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+T = TypeVar("T")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")  # Endpoint de login
@@ -26,11 +48,89 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")  # Endpoint de log
 # Funciones de hash de contraseña
 # --------------------------
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        PASSWORD_HASH_DURATION.observe(time.perf_counter() - start, "hash")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        PASSWORD_HASH_DURATION.observe(time.perf_counter() - start, "verify")
+
+
+class HashingPool:
+    """Ejecuta el hash de contraseñas fuera del event loop con una cola acotada.
+
+    bcrypt libera el GIL, así que un pool de hilos basta para paralelizarlo.
+    Si hay demasiadas operaciones pendientes se responde 503 de inmediato en
+    lugar de encolar sin límite.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="bcrypt")
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Ejecuta ``func`` en el pool o lanza 503 si está saturado."""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, intente de nuevo",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict[str, int]:
+        """Contadores de uso del pool."""
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+hashing_pool = HashingPool(BCRYPT_WORKERS, BCRYPT_MAX_PENDING)
+registry.register(
+    CallbackMetric(
+        "password_hash_pending",
+        "Operaciones de hash en curso o en cola.",
+        lambda: hashing_pool.pending,
+        "gauge",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "password_hash_rejected_total",
+        "Operaciones de hash rechazadas con 503 por saturación.",
+        lambda: hashing_pool.rejected,
+        "counter",
+    )
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """Versión de ``hash_password`` que no bloquea el event loop."""
+    return await hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Versión de ``verify_password`` que no bloquea el event loop."""
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -46,32 +146,122 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(async_session)
-) -> User:
-    """Obtiene el usuario actual a partir del token JWT."""
+def new_refresh_token() -> tuple[str, str]:
+    """Genera un token de refresco opaco y devuelve ``(token, hash)``."""
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+
+def hash_refresh_token(token: str) -> str:
+    """SHA-256 del token de refresco.
+
+    El token tiene 256 bits aleatorios, así que no necesita un hash lento como
+    bcrypt: un SHA-256 basta para que la tabla filtrada no sirva de nada.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# --------------------------
+# Caché de tokens verificados
+# --------------------------
+class CachedIdentity(NamedTuple):
+    """Identidad del usuario asociada a un token ya verificado."""
+
+    id: int
+    email: Optional[str]
+
+
+auth_cache: TTLCache[CachedIdentity] = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Descarta los tokens cacheados de un usuario."""
+    auth_cache.discard_where(lambda identity: identity.id == user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    """Invalida la caché cuando un usuario cambia o se elimina."""
+    invalidate_user_cache(target.id)  # type: ignore
+
+
+def decode_access_token(token: str) -> dict:
+    """Verifica la firma y la expiración de un token JWT y devuelve sus claims."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        id_usuario: int = int(payload.get("id_usuario"))
+        id_usuario = payload.get("id_usuario")
         if id_usuario is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="No se envio el usuario en el token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-    except jwt.PyJWTError as exc:
+        payload["id_usuario"] = int(id_usuario)
+        return payload
+    except (jwt.PyJWTError, TypeError, ValueError) as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="No se pudieron validar las credenciales",
             headers={"WWW-Authenticate": "Bearer"},
         ) from exc
 
-    result = await db.execute(select(User).where(User.id == id_usuario))
-    user = result.scalar_one_or_none()
-    if user is None:
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """Obtiene el usuario actual a partir del token JWT.
+
+    Los tokens verificados se cachean hasta su expiración (como máximo
+    ``AUTH_CACHE_TTL_SECONDS``), así que una petición repetida no decodifica el
+    JWT ni consulta la base de datos. Con caché, el usuario devuelto es una
+    instancia transitoria que solo tiene ``id`` y ``email``. La consulta del
+    usuario puede ir a la réplica de lectura.
+    """
+    identity = auth_cache.get(token)
+    if identity is not None:
+        return User(id=identity.id, email=identity.email)
+
+    payload = decode_access_token(token)
+    id_usuario: int = payload["id_usuario"]
+    if AUTH_TRUST_TOKEN_CLAIMS:
+        user = User(id=id_usuario)
+    else:
+        async with read_session(id_usuario) as db:
+            result = await db.execute(select(User).where(User.id == id_usuario))
+            user = result.scalar_one_or_none()
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="No existe el usuario en la base de datos",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+    ttl = AUTH_CACHE_TTL_SECONDS
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    auth_cache.set(token, CachedIdentity(id_usuario, user.email), ttl=ttl)  # type: ignore
+    return user
+
+
+async def async_read_session(current_user: User = Depends(get_current_user)):
+    """Sesión de solo lectura para el usuario autenticado (réplica o primario)."""
+    async with read_session(current_user.id) as session:  # type: ignore
+        yield session
+
+
+def require_internal_token(authorization: Optional[str] = Header(None)) -> None:
+    """Exige ``Authorization: Bearer <INTERNAL_API_TOKEN>`` en las rutas internas.
+
+    Sin ``INTERNAL_API_TOKEN`` configurado las rutas no existen para nadie, así
+    que la API pública no expone métricas ni contadores internos por defecto.
+    """
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), INTERNAL_API_TOKEN.encode()
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No existe el usuario en la base de datos",
+            detail="Token interno inválido",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
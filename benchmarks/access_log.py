@@ -0,0 +1,111 @@
+"""Throughput de una ruta trivial con y sin middleware de log de acceso.
+
+Compara la aplicación sin middleware, el middleware anterior
+(``@app.middleware("http")`` con ``FileHandler`` síncrono) y
+``AccessLogMiddleware`` con ``QueueHandler``. Llama a la aplicación ASGI
+directamente para que el cliente HTTP no domine la medición.
+
+Uso:
+    python -m benchmarks.access_log --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener
+from fastapi import FastAPI, Request
+from app.middleware import AccessLogMiddleware
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/tasks/{task_id}")
+    async def get_task(task_id: str):
+        return {"id": task_id}
+
+    return app
+
+
+def file_logger(name: str, path: str, queued: bool) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler: logging.Handler = logging.FileHandler(path)
+    if queued:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        QueueListener(log_queue, handler).start()
+        handler = QueueHandler(log_queue)
+    logger.addHandler(handler)
+    return logger
+
+
+async def drive(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/tasks/7afdfac0",
+        "raw_path": b"/tasks/7afdfac0",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    plain = build_app()
+
+    legacy = build_app()
+    legacy_logger = file_logger("bench.legacy", os.path.join(tmp, "legacy.log"), False)
+
+    @legacy.middleware("http")
+    async def log_requests(request: Request, call_next):
+        legacy_logger.info(f"Request: {request.method} {request.url}")
+        response = await call_next(request)
+        legacy_logger.info("Response status: %d", response.status_code)
+        return response
+
+    asgi = build_app()
+    asgi.add_middleware(
+        AccessLogMiddleware,
+        logger=file_logger("bench.asgi", os.path.join(tmp, "access.log"), True),
+        sample_rate=args.sample_rate,
+    )
+
+    for name, app in (
+        ("sin middleware", plain),
+        ("BaseHTTPMiddleware + FileHandler", legacy),
+        ("AccessLogMiddleware + QueueHandler", asgi),
+    ):
+        rps = asyncio.run(drive(app, args.requests))
+        print(f"{name:>36}: {rps:9.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Latencia del event loop durante una ráfaga de logins concurrentes.
+
+Compara verificar las contraseñas con bcrypt directamente en el event loop
+(comportamiento anterior) contra hacerlo en ``app.utils.hashing_pool``.
+
+Uso:
+    python -m benchmarks.bcrypt_event_loop --logins 40
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from app.utils import hash_password, hashing_pool, verify_password
+
+TICK = 0.005
+
+
+async def measure_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    """Mide cuánto se retrasa un temporizador de 5 ms respecto a lo esperado."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - start - TICK) * 1000)
+
+
+async def login_inline(hashed: str) -> None:
+    """Verificación síncrona dentro de la corrutina, como antes."""
+    verify_password("testpassword", hashed)
+
+
+async def login_pool(hashed: str) -> None:
+    """Verificación en el pool de hilos."""
+    await hashing_pool.run(verify_password, "testpassword", hashed)
+
+
+async def run(mode: str, logins: int, hashed: str) -> dict[str, float]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(measure_lag(stop, lags))
+    await asyncio.sleep(TICK * 4)
+    login = login_inline if mode == "inline" else login_pool
+    start = time.perf_counter()
+    await asyncio.gather(*(login(hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    lags.sort()
+    return {
+        "logins_per_s": logins / elapsed,
+        # Con el loop bloqueado apenas hay muestras: comparar también su número
+        "ticks": len(lags),
+        "ticks_expected": elapsed / TICK,
+        "lag_p50_ms": statistics.median(lags),
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[-1],
+        "lag_max_ms": lags[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    args = parser.parse_args()
+    hashed = hash_password("testpassword")
+    hashing_pool.max_pending = max(hashing_pool.max_pending, args.logins)
+    print(f"{args.logins} logins concurrentes, {hashing_pool.workers} hilos de bcrypt")
+    for mode in ("inline", "pool"):
+        result = asyncio.run(run(mode, args.logins, hashed))
+        print(
+            f"{mode:>6}: {result['logins_per_s']:7.1f} logins/s  "
+            f"ticks {result['ticks']}/{result['ticks_expected']:.0f}  "
+            f"lag p50 {result['lag_p50_ms']:8.2f} ms  "
+            f"p99 {result['lag_p99_ms']:8.2f} ms  max {result['lag_max_ms']:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
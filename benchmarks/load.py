@@ -0,0 +1,348 @@
+"""Prueba de carga de los endpoints principales contra una base de datos real.
+
+Siembra ``--users`` usuarios con ``--tasks`` tareas cada uno en la base de
+``DATABASE_URL`` y lanza ``--concurrency`` clientes virtuales contra la
+aplicación ASGI (``httpx.ASGITransport``) durante ``--duration`` segundos.
+Cada cliente elige la operación según ``--mix``. Por operación informa
+throughput, latencias p50/p95/p99, errores y sentencias SQL por petición.
+
+Con ``--output`` escribe los resultados en JSON; con ``--baseline`` los
+compara con los de una ejecución anterior. Los usuarios sembrados se borran
+al terminar salvo con ``--keep``.
+
+Uso:
+    python -m benchmarks.load --users 20 --tasks 500 --concurrency 32 \\
+        --duration 30 --output resultados.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any
+import httpx
+from sqlalchemy import delete, event, insert
+from app.admission import rate_limiter
+from app.database import AsyncSessionLocal, engine
+from app.ids import uuid7
+from app.main import access_logger, app
+from app.models.task import Task
+from app.models.user import User
+from app.utils import create_access_token, hash_password
+
+PASSWORD = "benchpassword"
+DEFAULT_MIX = "login=1,list=40,get=40,create=8,update=8,delete=3"
+
+current_op: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_op", default=None
+)
+
+
+class VirtualUser:
+    """Usuario sembrado con su token y las tareas que conoce."""
+
+    def __init__(self, user_id: int, email: str, task_ids: list[str]):
+        self.id = user_id
+        self.email = email
+        self.task_ids = task_ids
+        self.headers = {
+            "Authorization": "Bearer "
+            + create_access_token({"id_usuario": str(user_id)})
+        }
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"Operación desconocida en --mix: {name}")
+        weights[name] = int(weight)
+    return weights
+
+
+async def seed(users: int, tasks: int) -> list[VirtualUser]:
+    """Crea los usuarios y sus tareas con inserciones por lotes."""
+    run = uuid.uuid4().hex[:8]
+    password_hash = hash_password(PASSWORD)
+    async with AsyncSessionLocal() as db:
+        emails = [f"bench-{run}-{i}@example.com" for i in range(users)]
+        user_ids = (
+            await db.scalars(
+                insert(User).returning(User.id),
+                [{"email": email, "password_hash": password_hash} for email in emails],
+            )
+        ).all()
+        seeded = []
+        for user_id, email in zip(user_ids, emails):
+            task_ids = [uuid7() for _ in range(tasks)]
+            if task_ids:
+                await db.execute(
+                    insert(Task),
+                    [
+                        {"id": task_id, "titulo": f"Tarea {i}", "id_usuario": user_id}
+                        for i, task_id in enumerate(task_ids)
+                    ],
+                )
+            seeded.append(VirtualUser(user_id, email, [str(t) for t in task_ids]))
+        await db.commit()
+    return seeded
+
+
+async def cleanup(users: list[VirtualUser]) -> None:
+    ids = [user.id for user in users]
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Task).where(Task.id_usuario.in_(ids)))
+        await db.execute(delete(User).where(User.id.in_(ids)))
+        await db.commit()
+
+
+# ---------- Operaciones ----------
+
+
+async def op_login(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.post(
+        "/users/login/", data={"username": user.email, "password": PASSWORD}
+    )
+
+
+async def op_list(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.get("/tasks/", headers=user.headers)
+
+
+async def op_get(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    if not user.task_ids:
+        return await op_create(client, user)
+    task_id = random.choice(user.task_ids)
+    return await client.get(f"/tasks/{task_id}", headers=user.headers)
+
+
+async def op_create(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    response = await client.post(
+        "/tasks/", json={"titulo": "Tarea de carga"}, headers=user.headers
+    )
+    if response.status_code == 201:
+        user.task_ids.append(response.json()["id"])
+    return response
+
+
+async def op_update(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    if not user.task_ids:
+        return await op_create(client, user)
+    task_id = random.choice(user.task_ids)
+    return await client.put(
+        f"/tasks/{task_id}",
+        json={"estado": random.choice(["pendiente", "completada"])},
+        headers=user.headers,
+    )
+
+
+async def op_delete(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    if not user.task_ids:
+        return await op_create(client, user)
+    task_id = user.task_ids.pop(random.randrange(len(user.task_ids)))
+    return await client.delete(f"/tasks/{task_id}", headers=user.headers)
+
+
+OPERATIONS = {
+    "login": op_login,
+    "list": op_list,
+    "get": op_get,
+    "create": op_create,
+    "update": op_update,
+    "delete": op_delete,
+}
+
+
+# ---------- Ejecución ----------
+
+
+class Recorder:
+    """Latencias, errores y sentencias SQL por operación."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.queries: dict[str, int] = defaultdict(int)
+
+    def before_cursor_execute(self, *args: Any) -> None:
+        op = current_op.get()
+        if op is not None:
+            self.queries[op] += 1
+
+    def results(self, elapsed: float) -> dict[str, Any]:
+        results = {}
+        for op in sorted(self.latencies):
+            latencies = sorted(self.latencies[op])
+            count = len(latencies)
+            cuts = (
+                statistics.quantiles(latencies, n=100) if count > 1 else latencies * 99
+            )
+            results[op] = {
+                "requests": count,
+                "errors": self.errors[op],
+                "throughput_rps": count / elapsed,
+                "p50_ms": cuts[49] * 1000,
+                "p95_ms": cuts[94] * 1000,
+                "p99_ms": cuts[98] * 1000,
+                "queries_per_request": self.queries[op] / count,
+            }
+        return results
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    users: list[VirtualUser],
+    weights: dict[str, int],
+    deadline: float,
+    recorder: Recorder,
+) -> None:
+    names = list(weights)
+    counts = list(weights.values())
+    while time.perf_counter() < deadline:
+        op = random.choices(names, weights=counts)[0]
+        user = random.choice(users)
+        token = current_op.set(op)
+        start = time.perf_counter()
+        try:
+            response = await OPERATIONS[op](client, user)
+            failed = response.status_code >= 400
+        except Exception:  # pylint: disable=broad-except
+            failed = True
+        finally:
+            current_op.reset(token)
+        recorder.latencies[op].append(time.perf_counter() - start)
+        if failed:
+            recorder.errors[op] += 1
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    weights = parse_mix(args.mix)
+    users = await seed(args.users, args.tasks)
+    recorder = Recorder()
+    event.listen(
+        engine.sync_engine, "before_cursor_execute", recorder.before_cursor_execute
+    )
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(
+                *(
+                    client_loop(client, users, weights, deadline, recorder)
+                    for _ in range(args.concurrency)
+                )
+            )
+            elapsed = time.perf_counter() - start
+    finally:
+        event.remove(
+            engine.sync_engine, "before_cursor_execute", recorder.before_cursor_execute
+        )
+        if not args.keep:
+            await cleanup(users)
+        await engine.dispose()
+
+    operations = recorder.results(elapsed)
+    total = sum(op["requests"] for op in operations.values())
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "users": args.users,
+            "tasks": args.tasks,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": weights,
+        },
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed,
+        "operations": operations,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results: dict[str, Any], baseline: dict[str, Any] | None) -> None:
+    print(
+        f"{'operación':>10} {'peticiones':>10} {'errores':>8} {'req/s':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SQL/pet':>8}"
+    )
+    for op, stats in results["operations"].items():
+        print(
+            f"{op:>10} {stats['requests']:>10} {stats['errors']:>8} "
+            f"{stats['throughput_rps']:>9.1f} {stats['p50_ms']:>8.1f} "
+            f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+            f"{stats['queries_per_request']:>8.2f}"
+        )
+        previous = (baseline or {}).get("operations", {}).get(op)
+        if previous:
+            print(
+                f"{'vs base':>10} {'':>10} {'':>8} "
+                f"{change(previous['throughput_rps'], stats['throughput_rps']):>9} "
+                f"{change(previous['p50_ms'], stats['p50_ms']):>8} "
+                f"{change(previous['p95_ms'], stats['p95_ms']):>8} "
+                f"{change(previous['p99_ms'], stats['p99_ms']):>8} "
+                f"{change(previous['queries_per_request'], stats['queries_per_request']):>8}"
+            )
+    print(f"{'total':>10} {'':>10} {'':>8} {results['throughput_rps']:>9.1f}")
+
+
+def change(before: float, after: float) -> str:
+    return f"{(after - before) / before * 100:+.0f}%" if before else "-"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="fichero JSON con los resultados")
+    parser.add_argument("--baseline", help="resultados JSON con los que comparar")
+    parser.add_argument("--keep", action="store_true", help="no borrar los datos")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # Todos los clientes virtuales comparten IP y mide la aplicación, no los
+    # límites; el descarte de carga sigue activo
+    rate_limiter.ip_rate = rate_limiter.user_rate = 0
+    # El log por petición (medido en benchmarks.access_log) saturaría la consola
+    access_logger.setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    results = asyncio.run(run(args))
+    report(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Inserción y listado de tareas según los ids y los índices de ``tasks``.
+
+Crea una tabla con las columnas de ``tasks`` por cada esquema y mide:
+
+* ``inicial``: ids ``uuid4``, índice único duplicado sobre ``id`` y sin
+  índice por usuario, como en la primera migración.
+* ``antes``: igual, pero con el índice ``(id_usuario, fecha_creacion, id)``
+  de la paginación, como antes de la auditoría de índices.
+* ``despues``: ids ``uuid7`` y solo la clave primaria y el índice por usuario.
+
+Para cada esquema informa filas insertadas por segundo, tamaño de los índices
+y latencia de la primera página de un usuario. Usa la base de ``DATABASE_URL``
+y borra las tablas al terminar.
+
+Uso:
+    python -m benchmarks.task_ids --rows 200000 --users 200
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table
+from sqlalchemy import bindparam, func, insert, select, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import engine
+from app.ids import uuid7
+
+SCHEMAS = {
+    "inicial": (uuid.uuid4, True, False),
+    "antes": (uuid.uuid4, True, True),
+    "despues": (uuid7, False, True),
+}
+
+
+def build_table(metadata: MetaData, name: str, duplicate: bool, by_user: bool):
+    table = Table(
+        f"bench_task_ids_{name}",
+        metadata,
+        Column("id", UUID(as_uuid=True), primary_key=True),
+        Column("titulo", String(255), nullable=False),
+        Column("estado", String, nullable=False),
+        Column("fecha_creacion", DateTime(timezone=True), server_default=func.now()),
+        Column("id_usuario", Integer, nullable=False),
+    )
+    if duplicate:
+        Index(f"ix_{table.name}_id", table.c.id, unique=True)
+    if by_user:
+        Index(
+            f"ix_{table.name}_usuario",
+            table.c.id_usuario,
+            table.c.fecha_creacion,
+            table.c.id,
+        )
+    return table
+
+
+async def measure(table: Table, new_id, args: argparse.Namespace) -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(table.drop, checkfirst=True)
+        await conn.run_sync(table.create)
+
+    start = time.perf_counter()
+    for offset in range(0, args.rows, args.batch):
+        rows = [
+            {
+                "id": new_id(),
+                "titulo": f"Tarea {i}",
+                "estado": "pendiente",
+                "id_usuario": random.randrange(args.users),
+            }
+            for i in range(offset, min(offset + args.batch, args.rows))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), rows)
+    inserted = args.rows / (time.perf_counter() - start)
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"ANALYZE {table.name}"))
+        index_bytes = await conn.scalar(text(f"SELECT pg_indexes_size('{table.name}')"))
+        page = (
+            select(table)
+            .where(table.c.id_usuario == bindparam("user"))
+            .order_by(table.c.fecha_creacion, table.c.id)
+            .limit(100)
+        )
+        timings = []
+        for _ in range(args.lists):
+            user = random.randrange(args.users)
+            start = time.perf_counter()
+            (await conn.execute(page, {"user": user})).all()
+            timings.append(time.perf_counter() - start)
+        await conn.run_sync(table.drop)
+    return {
+        "filas/s": inserted,
+        "índices MB": index_bytes / 2**20,
+        "lista p50 ms": statistics.median(timings) * 1000,
+        "lista p95 ms": statistics.quantiles(timings, n=20)[18] * 1000,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, dict]:
+    metadata = MetaData()
+    results = {}
+    try:
+        for name, (new_id, duplicate, by_user) in SCHEMAS.items():
+            table = build_table(metadata, name, duplicate, by_user)
+            results[name] = await measure(table, new_id, args)
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--lists", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    results = asyncio.run(run(args))
+    columns = list(next(iter(results.values())))
+    print(f"{'esquema':>10}" + "".join(f"{column:>14}" for column in columns))
+    for name, stats in results.items():
+        print(f"{name:>10}" + "".join(f"{stats[c]:>14.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
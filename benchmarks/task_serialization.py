@@ -0,0 +1,123 @@
+"""Tiempo de renderizar una lista de tareas a JSON.
+
+Compara tres caminos para la misma lista:
+
+* ``response_model``: objetos ``Task`` validados uno a uno con
+  ``response_model=list[TaskOut]`` y codificados con ``JSONResponse``, como
+  hacía ``GET /tasks/`` originalmente.
+* ``TypeAdapter``: los mismos objetos validados con un ``TypeAdapter``
+  precompilado y codificados con ``dump_json``.
+* ``filas``: filas de columnas codificadas directamente con
+  ``rows_to_json``, el camino actual de ``GET /tasks/``.
+
+Llama a la aplicación ASGI directamente y no usa base de datos.
+
+Uso:
+    python -m benchmarks.task_serialization --tasks 10000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, Response
+from pydantic import TypeAdapter
+from app.models.task import Task
+from app.responses import rows_to_json
+from app.schemas.task import TaskOut
+
+TaskRow = namedtuple("TaskRow", list(TaskOut.model_fields))  # type: ignore
+
+
+def build_rows(count: int) -> list:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        TaskRow(
+            titulo=f"Tarea {i}",
+            descripcion="Descripción de la tarea " * 4 if i % 2 else None,
+            estado="pendiente" if i % 3 else "completada",
+            id=uuid.uuid4(),
+            id_usuario=1,
+            fecha_creacion=start + timedelta(seconds=i),
+            updated_at=start + timedelta(seconds=i),
+            version=1,
+        )
+        for i in range(count)
+    ]
+
+
+def build_apps(rows: list) -> dict[str, FastAPI]:
+    tasks = [Task(**row._asdict()) for row in rows]
+    adapter = TypeAdapter(list[TaskOut])
+    apps = {name: FastAPI() for name in ("response_model", "TypeAdapter", "filas")}
+
+    @apps["response_model"].get("/tasks/", response_model=list[TaskOut])
+    async def with_response_model():
+        return tasks
+
+    @apps["TypeAdapter"].get("/tasks/")
+    async def with_type_adapter():
+        body = adapter.dump_json(adapter.validate_python(tasks, from_attributes=True))
+        return Response(body, media_type="application/json")
+
+    @apps["filas"].get("/tasks/")
+    async def with_rows():
+        return Response(rows_to_json(rows), media_type="application/json")
+
+    return apps
+
+
+async def drive(app, requests: int) -> list[float]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/tasks/",
+        "raw_path": b"/tasks/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        timings.append(time.perf_counter() - start)
+    assert size > 0
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    apps = build_apps(build_rows(args.tasks))
+    for name, app in apps.items():
+        timings = asyncio.run(drive(app, args.requests))
+        print(
+            f"{name:>15}: mediana {statistics.median(timings) * 1000:8.1f} ms"
+            f"  mínimo {min(timings) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()